@@ -204,13 +204,14 @@ class BaselineV1Live:
                         # Check if already logged to prevent duplicates
                         swing_time_iso = swing['timestamp'].isoformat() if hasattr(swing['timestamp'], 'isoformat') else str(swing['timestamp'])
 
-                        cursor = self.state_manager.conn.cursor()
-                        cursor.execute('''
-                            SELECT COUNT(*) FROM all_swings_log
-                            WHERE symbol = ? AND swing_time = ? AND swing_type = ?
-                        ''', (symbol, swing_time_iso, swing['type']))
-
-                        exists = cursor.fetchone()[0] > 0
+                        with self.state_manager.db_lock:
+                            cursor = self.state_manager.conn.cursor()
+                            cursor.execute('''
+                                SELECT COUNT(*) FROM all_swings_log
+                                WHERE symbol = ? AND swing_time = ? AND swing_type = ?
+                            ''', (symbol, swing_time_iso, swing['type']))
+
+                            exists = cursor.fetchone()[0] > 0
 
                         if not exists:
                             self.state_manager.log_swing_detection(
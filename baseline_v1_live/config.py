@@ -115,13 +115,15 @@ WEBSOCKET_RECONNECT_DELAY = 5  # Seconds between reconnection attempts
 WEBSOCKET_MAX_RECONNECT_ATTEMPTS = 5  # Max reconnection attempts
 WEBSOCKET_MODE = 2  # Quote mode (LTP, OHLC, Volume)
 
+# Historical Data
+HISTORY_FETCH_WORKERS = 8  # Concurrent history API requests (keep within broker rate limit)
+
 # Bar Aggregation
 BAR_INTERVAL_SECONDS = 60  # 1-minute bars
 MIN_TICKS_PER_BAR = 5      # Minimum ticks to form valid bar
 
 # Memory Management
-MAX_BARS_PER_SYMBOL = 400  # Keep full trading session (9:15 AM - 3:30 PM = ~375 bars)
-BAR_PRUNING_THRESHOLD = 450  # Prune when bars exceed this threshold
+MAX_BARS_PER_SYMBOL = 400  # Keep full trading session (9:15 AM - 3:30 PM = ~375 bars); older bars auto-evicted
 # Swing candidates persist for entire trading day but are cleared at day start
 # No intraday time-based expiry - swings valid until market structure invalidates them
 
@@ -28,6 +28,7 @@ This reduces API calls, broker RMS flags, and ensures order is ready if price re
 
 import logging
 import copy
+import sys
 from typing import Dict, List, Optional
 from datetime import datetime
 
@@ -41,6 +42,12 @@ import pytz
 logger = logging.getLogger(__name__)
 IST = pytz.timezone('Asia/Kolkata')
 
+# Pre-formatted threshold for rejection messages (MIN_VWAP_PREMIUM is a config constant)
+_MIN_VWAP_PREMIUM_STR = f"{MIN_VWAP_PREMIUM:.1%}"
+
+# Placeholder for "no qualified strike" in current_best (shared, never mutated)
+_EMPTY_BEST = {'symbol': None}
+
 
 class ContinuousFilterEngine:
     """
@@ -49,6 +56,18 @@ class ContinuousFilterEngine:
     Maintains swing candidates and evaluates them on every new bar,
     managing proactive limit orders based on price proximity
     """
+
+    # Fixed attribute set - no per-instance __dict__, slot access on the per-bar path
+    __slots__ = (
+        'swing_candidates',
+        'stage1_swings_by_type',
+        'current_best',
+        '_state_manager',
+        'last_log_time',
+        'last_rejection_log',
+        'rejection_stats',
+        'last_evaluation_state',
+    )
     
     def __init__(self, state_manager=None):
         # Swing candidates that passed static filter (100-300 price range)
@@ -63,9 +82,10 @@ class ContinuousFilterEngine:
         }
         
         # Current best qualified strikes (updated every bar)
+        # Never None - _EMPTY_BEST (symbol=None) marks "no qualified strike"
         self.current_best = {
-            'CE': None,  # Best call strike
-            'PE': None   # Best put strike
+            'CE': _EMPTY_BEST,  # Best call strike
+            'PE': _EMPTY_BEST   # Best put strike
         }
         
         # State manager reference for DB logging
@@ -91,7 +111,7 @@ class ContinuousFilterEngine:
         """Clear in-memory swing data for new trading day"""
         self.swing_candidates.clear()
         self.stage1_swings_by_type = {'CE': [], 'PE': []}
-        self.current_best = {'CE': None, 'PE': None}
+        self.current_best = {'CE': _EMPTY_BEST, 'PE': _EMPTY_BEST}
         self.last_evaluation_state.clear()
         logger.info("[DAILY-RESET] Cleared in-memory swing data")
     
@@ -157,7 +177,7 @@ class ContinuousFilterEngine:
                 old_swing = self.swing_candidates[symbol]
                 logger.warning(
                     f"[VWAP-REJECT] {symbol}: New swing @ Rs.{swing_price:.2f} "
-                    f"VWAP premium {vwap_premium:.1%} < {MIN_VWAP_PREMIUM:.1%} "
+                    f"VWAP premium {vwap_premium:.1%} < {_MIN_VWAP_PREMIUM_STR} "
                     f"(VWAP @ swing: Rs.{vwap_at_swing:.2f}) - REJECTED. "
                     f"Removing old swing @ Rs.{old_swing['price']:.2f} (stale)"
                 )
@@ -177,7 +197,7 @@ class ContinuousFilterEngine:
             else:
                 logger.warning(
                     f"[VWAP-REJECT] {symbol}: New swing @ Rs.{swing_price:.2f} "
-                    f"VWAP premium {vwap_premium:.1%} < {MIN_VWAP_PREMIUM:.1%} "
+                    f"VWAP premium {vwap_premium:.1%} < {_MIN_VWAP_PREMIUM_STR} "
                     f"(VWAP @ swing: Rs.{vwap_at_swing:.2f}) - REJECTED"
                 )
 
@@ -192,7 +212,7 @@ class ContinuousFilterEngine:
                         'vwap_at_swing': vwap_at_swing,
                         'vwap_premium_percent': vwap_premium,
                         'sl_percent': 0,
-                        'rejection_reason': f'VWAP premium {vwap_premium:.1%} < {MIN_VWAP_PREMIUM:.1%}'
+                        'rejection_reason': f'VWAP premium {vwap_premium:.1%} < {_MIN_VWAP_PREMIUM_STR}'
                     }])
                 except Exception as e:
                     logger.debug(f"Failed to save VWAP rejection to DB: {e}")
@@ -209,6 +229,11 @@ class ContinuousFilterEngine:
         # Add new swing to candidates (make a copy to avoid reference issues)
         # CRITICAL: Use deepcopy() to prevent modifications to swing_info from affecting stored value
         self.swing_candidates[symbol] = copy.deepcopy(swing_info)
+        # Intern option_type so per-type scans can use identity checks
+        if option_type is not None:
+            self.swing_candidates[symbol]['option_type'] = sys.intern(option_type)
+        # VWAP premium is fixed at swing formation - store it so per-bar evaluation doesn't recompute it
+        self.swing_candidates[symbol]['vwap_premium'] = vwap_premium
 
         # Clear any previous evaluation state for this symbol (new swing detected)
         if symbol in self.last_evaluation_state:
@@ -229,7 +254,7 @@ class ContinuousFilterEngine:
 
         logger.info(
             f"[VWAP-QUALIFIED] {symbol}: Swing @ Rs.{swing_price:.2f} "
-            f"VWAP premium {vwap_premium:.1%} >= {MIN_VWAP_PREMIUM:.1%} - Added to qualified pool"
+            f"VWAP premium {vwap_premium:.1%} >= {_MIN_VWAP_PREMIUM_STR} - Added to qualified pool"
         )
     
     def remove_swing_candidate(self, symbol: str):
@@ -319,27 +344,6 @@ class ContinuousFilterEngine:
                 f"CE symbols: {[s.get('symbol') for s in self.stage1_swings_by_type['CE']]}"
             )
 
-        # Check for broken swings in VWAP-qualified pool and remove them
-        for option_type in ['CE', 'PE']:
-            broken_swings = []
-            for swing_info in self.stage1_swings_by_type[option_type]:
-                symbol = swing_info.get('symbol')
-                if symbol and symbol in latest_bars:
-                    current_bar = latest_bars[symbol]
-                    swing_low = swing_info['price']
-                    
-                    # Check if swing broke (price went BELOW swing_low)
-                    if current_bar.low < swing_low:
-                        logger.info(
-                            f"[SWING-BREAK] {symbol}: Swing @ Rs.{swing_low:.2f} broke "
-                            f"(Low: {current_bar.low:.2f}) - removing from VWAP pool"
-                        )
-                        broken_swings.append(swing_info)
-            
-            # Remove broken swings
-            for broken in broken_swings:
-                self.stage1_swings_by_type[option_type].remove(broken)
-        
         # Reset rejection stats for this evaluation
         self.rejection_stats = {
             'vwap_premium_low': 0,
@@ -347,96 +351,10 @@ class ContinuousFilterEngine:
             'sl_percent_high': 0,
             'no_data': 0
         }
-        
-        # Evaluate VWAP-qualified swings instead of all swing_candidates
-        # These swings already passed VWAP filter, now check SL%
-        
-        for option_type in ['CE', 'PE']:
-            for swing_info in self.stage1_swings_by_type[option_type]:
-                symbol = swing_info.get('symbol')
-                if not symbol:
-                    continue
-                # Skip if no bar data available
-                if symbol not in latest_bars:
-                    self.rejection_stats['no_data'] += 1
-                    logger.warning(
-                        f"[NO-BAR-DATA] {symbol}: No bar data in latest_bars - cannot evaluate SL%. "
-                        f"Swing in Stage-1 pool but missing bar data!"
-                    )
-                    continue
-                
-                current_bar = latest_bars[symbol]
-                
-                # Validate swing info has required fields
-                if not all(k in swing_info for k in ['price', 'vwap', 'index']):
-                    logger.warning(f"[EVAL] {symbol}: Incomplete swing_info, skipping")
-                    continue
-                
-                swing_low = swing_info['price']
-                vwap_at_swing = swing_info['vwap']
-                swing_type = swing_info.get('type', 'Low')
-
-                # Only process swing LOWs (not swing highs)
-                if swing_type != 'Low':
-                    continue
 
-                # Get highest high since swing formed
-                detector = swing_detector.detectors.get(symbol)
-                if not detector:
-                    continue
-                
-                highest_high = self._get_highest_high_since_swing(
-                    detector,
-                    swing_info['index']
-                )
-                
-                # Calculate dynamic metrics
-                sl_price = highest_high + 1
-                sl_points = sl_price - swing_low
-                sl_percent = sl_points / swing_low
-                vwap_premium = (swing_low - vwap_at_swing) / vwap_at_swing
-                
-                # ═══ DYNAMIC FILTERS ═══
-                # Note: VWAP already passed (these are from stage1_swings_by_type)
-                # Only check SL% here
-                
-                # Filter: SL% between 2-10%
-                if sl_percent < MIN_SL_PERCENT:
-                    self.rejection_stats['sl_percent_low'] += 1
-                    continue
-                    
-                if sl_percent > MAX_SL_PERCENT:
-                    self.rejection_stats['sl_percent_high'] += 1
-                    continue
-                
-                # Calculate position size
-                lots_required = R_VALUE / (sl_points * LOT_SIZE)
-                lots = min(lots_required, MAX_LOTS_PER_POSITION)
-                quantity = int(lots) * LOT_SIZE
-                actual_R = sl_points * int(lots) * LOT_SIZE
-                
-                # Enrich candidate with calculated fields
-                enriched = {
-                    'symbol': symbol,
-                    'option_type': option_type,
-                    'swing_low': swing_low,
-                    'swing_time': swing_info['timestamp'],
-                    'vwap_at_swing': vwap_at_swing,
-                    'current_price': current_bar.close,
-                    'current_high': current_bar.high,
-                    'highest_high_since_swing': highest_high,
-                    'sl_price': sl_price,
-                    'sl_points': sl_points,
-                    'sl_percent': sl_percent,
-                    'vwap_premium': vwap_premium,
-                    'lots': int(lots),
-                    'quantity': quantity,
-                    'actual_R': actual_R,
-                    'score': abs(sl_points - TARGET_SL_POINTS),
-                    'entry_price': swing_low
-                }
-                
-                qualified[option_type].append(enriched)
+        # CE and PE pools are independent - each pass prunes and evaluates its own pool
+        for option_type in ['CE', 'PE']:
+            qualified[option_type] = self._evaluate_option_type(option_type, latest_bars, swing_detector)
         
         # Select best strike for each option type
         best_strikes = {}
@@ -448,8 +366,7 @@ class ContinuousFilterEngine:
                 best_strikes[option_type] = best
                 
                 # Log if best strike changed
-                if self.current_best[option_type] is None or \
-                   self.current_best[option_type]['symbol'] != best['symbol']:
+                if self.current_best[option_type]['symbol'] != best['symbol']:
                     logger.info(
                         f"[BEST-{option_type}] {best['symbol']}: "
                         f"Entry=Rs.{best['swing_low']:.2f}, SL=Rs.{best['sl_price']:.2f} "
@@ -459,8 +376,11 @@ class ContinuousFilterEngine:
             else:
                 best_strikes[option_type] = None
         
-        # Update current best
-        self.current_best = best_strikes
+        # Update current best (callers still get None for "no strike" in the returned dict)
+        self.current_best = {
+            option_type: best or _EMPTY_BEST
+            for option_type, best in best_strikes.items()
+        }
         
         # Log rejection summary every 30 seconds (INFO level for visibility)
         import time
@@ -482,6 +402,126 @@ class ContinuousFilterEngine:
         
         return best_strikes
     
+    def _evaluate_option_type(self, option_type: str, latest_bars: Dict, swing_detector) -> List[Dict]:
+        """
+        Prune broken swings from one Stage-1 pool and evaluate the survivors
+
+        Swings are removed when the latest bar's low trades BELOW swing_low.
+        Remaining VWAP-qualified swings are checked against the dynamic SL% filter.
+
+        Returns:
+            List of enriched candidates for option_type that passed all filters
+        """
+        pool = []
+        for swing_info in self.stage1_swings_by_type[option_type]:
+            symbol = swing_info.get('symbol')
+            if symbol and symbol in latest_bars:
+                current_bar = latest_bars[symbol]
+                swing_low = swing_info['price']
+
+                # Check if swing broke (price went BELOW swing_low)
+                if current_bar.low < swing_low:
+                    logger.info(
+                        f"[SWING-BREAK] {symbol}: Swing @ Rs.{swing_low:.2f} broke "
+                        f"(Low: {current_bar.low:.2f}) - removing from VWAP pool"
+                    )
+                    continue
+            pool.append(swing_info)
+        self.stage1_swings_by_type[option_type] = pool
+
+        # Evaluate VWAP-qualified swings instead of all swing_candidates
+        # These swings already passed VWAP filter, now check SL%
+        qualified = []
+        for swing_info in self.stage1_swings_by_type[option_type]:
+            symbol = swing_info.get('symbol')
+            if not symbol:
+                continue
+            # Skip if no bar data available
+            if symbol not in latest_bars:
+                self.rejection_stats['no_data'] += 1
+                logger.warning(
+                    f"[NO-BAR-DATA] {symbol}: No bar data in latest_bars - cannot evaluate SL%. "
+                    f"Swing in Stage-1 pool but missing bar data!"
+                )
+                continue
+            
+            current_bar = latest_bars[symbol]
+            
+            # Validate swing info has required fields
+            if not all(k in swing_info for k in ['price', 'vwap', 'index']):
+                logger.warning(f"[EVAL] {symbol}: Incomplete swing_info, skipping")
+                continue
+            
+            swing_low = swing_info['price']
+            vwap_at_swing = swing_info['vwap']
+            swing_type = swing_info.get('type', 'Low')
+
+            # Only process swing LOWs (not swing highs)
+            if swing_type != 'Low':
+                continue
+
+            # Get highest high since swing formed
+            detector = swing_detector.detectors.get(symbol)
+            if not detector:
+                continue
+            
+            highest_high = self._get_highest_high_since_swing(
+                detector,
+                swing_info['index']
+            )
+            
+            # Calculate dynamic metrics
+            sl_price = highest_high + 1
+            sl_points = sl_price - swing_low
+            sl_percent = sl_points / swing_low
+            vwap_premium = swing_info.get('vwap_premium')
+            if vwap_premium is None:
+                vwap_premium = (swing_low - vwap_at_swing) / vwap_at_swing
+            
+            # ═══ DYNAMIC FILTERS ═══
+            # Note: VWAP already passed (these are from stage1_swings_by_type)
+            # Only check SL% here
+            
+            # Filter: SL% between 2-10%
+            if sl_percent < MIN_SL_PERCENT:
+                self.rejection_stats['sl_percent_low'] += 1
+                continue
+                
+            if sl_percent > MAX_SL_PERCENT:
+                self.rejection_stats['sl_percent_high'] += 1
+                continue
+            
+            # Calculate position size
+            lots_required = R_VALUE / (sl_points * LOT_SIZE)
+            lots = min(lots_required, MAX_LOTS_PER_POSITION)
+            quantity = int(lots) * LOT_SIZE
+            actual_R = sl_points * int(lots) * LOT_SIZE
+            
+            # Enrich candidate with calculated fields
+            enriched = {
+                'symbol': symbol,
+                'option_type': option_type,
+                'swing_low': swing_low,
+                'swing_time': swing_info['timestamp'],
+                'vwap_at_swing': vwap_at_swing,
+                'current_price': current_bar.close,
+                'current_high': current_bar.high,
+                'highest_high_since_swing': highest_high,
+                'sl_price': sl_price,
+                'sl_points': sl_points,
+                'sl_percent': sl_percent,
+                'vwap_premium': vwap_premium,
+                'lots': int(lots),
+                'quantity': quantity,
+                'actual_R': actual_R,
+                'score': abs(sl_points - TARGET_SL_POINTS),
+                'entry_price': swing_low
+            }
+            
+            qualified.append(enriched)
+
+        return qualified
+    
     def _get_highest_high_since_swing(self, detector, swing_index: int) -> float:
         """Get highest high from all bars after swing index"""
         if not detector.bars or swing_index >= len(detector.bars):
@@ -524,9 +564,9 @@ class ContinuousFilterEngine:
             existing_order = pending_orders.get(option_type)
 
             # No candidate qualified - cancel any existing order
-            if candidate is None:
+            if candidate['symbol'] is None:
                 logger.debug(
-                    f"[NO-CANDIDATE-{option_type}] self.current_best[{option_type}] is None - "
+                    f"[NO-CANDIDATE-{option_type}] self.current_best[{option_type}] is empty - "
                     f"no qualified candidate in memory"
                 )
                 triggers[option_type] = {'action': 'cancel', 'candidate': None, 'reason': 'no qualified candidate'}
@@ -641,26 +681,39 @@ class ContinuousFilterEngine:
         - All rejected strikes (with rejection reasons)
         - All qualified but not selected strikes (with comparison to selected)
         """
+        # Everything below is INFO output - skip the analysis entirely when INFO is disabled
+        if not logger.isEnabledFor(logging.INFO):
+            return
+
         selected_symbol = selected_candidate['symbol']
         selected_sl_points = selected_candidate['sl_points']
+        option_type = sys.intern(option_type)
         
         logger.info(
-            f"\n{'='*80}\n"
-            f"[DECISION-POINT] {option_type} Strike Selection Analysis\n"
-            f"{'='*80}"
+            "\n%s\n[DECISION-POINT] %s Strike Selection Analysis\n%s",
+            '=' * 80, option_type, '=' * 80
         )
         
         # Log selected strike
         logger.info(
-            f"✅ SELECTED: {selected_symbol}\n"
-            f"   Entry Price:    Rs.{selected_candidate['swing_low']:.2f}\n"
-            f"   Current Price:  Rs.{selected_candidate['current_price']:.2f}\n"
-            f"   SL Price:       Rs.{selected_candidate['sl_price']:.2f}\n"
-            f"   SL Points:      {selected_sl_points:.2f} (target: {TARGET_SL_POINTS})\n"
-            f"   SL %:           {selected_candidate['sl_percent']:.1%}\n"
-            f"   VWAP Premium:   {selected_candidate['vwap_premium']:.1%}\n"
-            f"   Lots:           {selected_candidate['lots']} ({selected_candidate['quantity']} qty)\n"
-            f"   Actual R:       Rs.{selected_candidate['actual_R']:.0f}"
+            "✅ SELECTED: %s\n"
+            "   Entry Price:    Rs.%.2f\n"
+            "   Current Price:  Rs.%.2f\n"
+            "   SL Price:       Rs.%.2f\n"
+            "   SL Points:      %.2f (target: %s)\n"
+            "   SL %%:           %.1f%%\n"
+            "   VWAP Premium:   %.1f%%\n"
+            "   Lots:           %s (%s qty)\n"
+            "   Actual R:       Rs.%.0f",
+            selected_symbol,
+            selected_candidate['swing_low'],
+            selected_candidate['current_price'],
+            selected_candidate['sl_price'],
+            selected_sl_points, TARGET_SL_POINTS,
+            selected_candidate['sl_percent'] * 100,
+            selected_candidate['vwap_premium'] * 100,
+            selected_candidate['lots'], selected_candidate['quantity'],
+            selected_candidate['actual_R']
         )
         
         # Analyze all other swing candidates of same option type
@@ -668,7 +721,7 @@ class ContinuousFilterEngine:
         rejected_candidates = []
         
         for symbol, swing_info in self.swing_candidates.items():
-            if swing_info.get('option_type') != option_type:
+            if swing_info.get('option_type') is not option_type:
                 continue
             
             if symbol == selected_symbol:
@@ -680,13 +733,15 @@ class ContinuousFilterEngine:
             # Calculate metrics for this candidate
             swing_low = swing_info['price']
             vwap_at_swing = swing_info['vwap']
-            vwap_premium = (swing_low - vwap_at_swing) / vwap_at_swing if vwap_at_swing > 0 else 0
+            vwap_premium = swing_info.get('vwap_premium')
+            if vwap_premium is None:
+                vwap_premium = (swing_low - vwap_at_swing) / vwap_at_swing if vwap_at_swing > 0 else 0
             
             # Check VWAP filter
             rejection_reasons = []
             
             if vwap_premium < MIN_VWAP_PREMIUM:
-                rejection_reasons.append(f"VWAP premium {vwap_premium:.1%} < {MIN_VWAP_PREMIUM:.1%}")
+                rejection_reasons.append(f"VWAP premium {vwap_premium:.1%} < {_MIN_VWAP_PREMIUM_STR}")
             
             # Note: We would need swing_detector reference to calculate SL% for comparison
             # For simplicity, just check VWAP here - SL% rejection will be logged elsewhere
@@ -706,35 +761,44 @@ class ContinuousFilterEngine:
                     'vwap_premium': vwap_premium
                 })
         
-        # Log rejected candidates
+        # Log rejected candidates (one message per section keeps handler dispatch constant)
         if rejected_candidates:
-            logger.info(f"\n❌ REJECTED CANDIDATES ({len(rejected_candidates)}):")
-            for rej in rejected_candidates:
-                reasons_str = ", ".join(rej['reasons'])
-                logger.info(
-                    f"   {rej['symbol']}: Entry Rs.{rej['swing_low']:.2f} - {reasons_str}"
-                )
+            lines = [
+                f"   {rej['symbol']}: Entry Rs.{rej['swing_low']:.2f} - {', '.join(rej['reasons'])}"
+                for rej in rejected_candidates
+            ]
+            logger.info("\n❌ REJECTED CANDIDATES (%d):\n%s", len(rejected_candidates), "\n".join(lines))
         
         # Log qualified but not selected
         if qualified_not_selected:
-            logger.info(f"\n[WARNING]️  QUALIFIED BUT NOT SELECTED ({len(qualified_not_selected)}):")
-            for qual in qualified_not_selected:
-                logger.info(
-                    f"   {qual['symbol']}: Entry Rs.{qual['swing_low']:.2f}, "
-                    f"VWAP Premium {qual['vwap_premium']:.1%} - "
-                    f"Not selected (selected strike has SL points closer to target 10)"
-                )
+            lines = [
+                f"   {qual['symbol']}: Entry Rs.{qual['swing_low']:.2f}, "
+                f"VWAP Premium {qual['vwap_premium']:.1%} - "
+                f"Not selected (selected strike has SL points closer to target 10)"
+                for qual in qualified_not_selected
+            ]
+            logger.info(
+                "\n[WARNING]️  QUALIFIED BUT NOT SELECTED (%d):\n%s", len(qualified_not_selected), "\n".join(lines)
+            )
         
-        logger.info(f"{'='*80}\n")
+        logger.info("%s\n", '=' * 80)
     
     def get_summary(self) -> Dict:
         """Get summary of current state"""
+        # Single pass over candidates for both counts
+        ce_count = pe_count = 0
+        for candidate in self.swing_candidates.values():
+            if candidate['option_type'] == 'CE':
+                ce_count += 1
+            elif candidate['option_type'] == 'PE':
+                pe_count += 1
+
         return {
             'total_candidates': len(self.swing_candidates),
-            'ce_candidates': len([c for c in self.swing_candidates.values() if c['option_type'] == 'CE']),
-            'pe_candidates': len([c for c in self.swing_candidates.values() if c['option_type'] == 'PE']),
-            'best_ce': self.current_best['CE']['symbol'] if self.current_best['CE'] else None,
-            'best_pe': self.current_best['PE']['symbol'] if self.current_best['PE'] else None
+            'ce_candidates': ce_count,
+            'pe_candidates': pe_count,
+            'best_ce': self.current_best['CE']['symbol'],
+            'best_pe': self.current_best['PE']['symbol']
         }
 
 
@@ -18,11 +18,20 @@ Features:
 """
 
 import logging
-from collections import defaultdict
-from datetime import datetime, time, timedelta
-from threading import RLock, Thread
+import math
+import queue
+import sys
+import warnings
+from itertools import islice
+from collections import deque
+from contextlib import contextmanager
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, time, timedelta, timezone
+from threading import Event, Lock, Thread
 import time as time_module
-import pytz
+import numpy as np
+import pandas as pd
 
 from openalgo import api
 from .config import (
@@ -41,35 +50,128 @@ from .config import (
     STALE_DATA_TIMEOUT,
     MAX_BAR_AGE_SECONDS,
     MAX_BARS_PER_SYMBOL,
-    BAR_PRUNING_THRESHOLD,
+    HISTORY_FETCH_WORKERS,
     MARKET_START_TIME,
     MARKET_CLOSE_TIME,
 )
 
 logger = logging.getLogger(__name__)
-IST = pytz.timezone('Asia/Kolkata')
+# IST has no DST, so a fixed offset gives the same times as pytz's Asia/Kolkata
+# without its per-call transition lookup (datetime.now(IST) is on the tick path)
+IST = timezone(timedelta(hours=5, minutes=30), 'IST')
+
+# Per-symbol Structure-of-Arrays fields (parallel arrays, timestamp as epoch seconds)
+# cum_pv/cum_vol are the session VWAP totals as of each bar
+BAR_ARRAY_FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume', 'vwap', 'cum_pv', 'cum_vol')
+
+# Per-bar prices fit float32 (~7 significant digits) and minute volume fits int32;
+# timestamps and cumulative totals stay float64 to avoid drift
+BAR_ARRAY_DTYPES = {
+    'timestamp': np.float64,
+    'open': np.float32,
+    'high': np.float32,
+    'low': np.float32,
+    'close': np.float32,
+    'volume': np.int32,
+    'vwap': np.float32,
+    'cum_pv': np.float64,
+    'cum_vol': np.float64,
+}
+INT32_MAX = np.iinfo(np.int32).max
+
+# Number of striped locks guarding per-symbol state (power of two)
+LOCK_STRIPES = 16
+
+# Max ticks the aggregator thread applies per drain of the tick queue
+TICK_BATCH_SIZE = 256
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_MINUTE = 60 * NS_PER_SECOND
+
+
+def _ohlcv_columns(df):
+    """Extract open/high/low/close/volume as float64 arrays (missing columns read as 0)"""
+    columns = []
+    for col in ('open', 'high', 'low', 'close', 'volume'):
+        if col not in df.columns:
+            col = col.capitalize()
+        if col in df.columns:
+            columns.append(df[col].to_numpy(dtype=np.float64))
+        else:
+            columns.append(np.zeros(len(df)))
+    return columns
+
+
+def _cumulative_vwap(h, l, c, v, cum_pv=0.0, cum_vol=0.0):
+    """
+    Session VWAP per bar, continuing from existing cumulative values
+
+    Uses typical price = (high + low + close) / 3.
+
+    Returns:
+        (vwap, cum_pv_arr, cum_vol_arr) arrays
+    """
+    typical = (h + l + c) / 3.0
+    cum_pv_arr = cum_pv + np.cumsum(typical * v)
+    cum_vol_arr = cum_vol + np.cumsum(v)
+    vwap = np.divide(cum_pv_arr, cum_vol_arr, out=typical.copy(), where=cum_vol_arr > 0)
+    return vwap, cum_pv_arr, cum_vol_arr
+
+
+def _bar_index(index):
+    """
+    Normalize a history DataFrame index (datetime is the index, not a column)
+
+    Returns:
+        IST-aware, ns-resolution DatetimeIndex rounded down to the minute
+    """
+    index = pd.DatetimeIndex(index)
+    index = index.tz_localize(IST) if index.tz is None else index.tz_convert(IST)
+    return index.floor('min').as_unit('ns')
+
+
+def _ist_epoch_ns(day, clock_time):
+    """Epoch nanoseconds of clock_time (IST) on day"""
+    return int(datetime.combine(day, clock_time, IST).timestamp()) * NS_PER_SECOND
+
+
+@lru_cache(maxsize=8)
+def _option_symbols(atm_strike, expiry_date):
+    """Interned CE/PE symbols around ATM, memoized per (atm, expiry) for ATM drift"""
+    strike_interval = 50  # NIFTY strike interval
+    prefix = f"NIFTY{expiry_date}"
+    return tuple(
+        sys.intern(f"{prefix}{atm_strike + i * strike_interval}{side}")
+        for i in range(-STRIKE_SCAN_RANGE, STRIKE_SCAN_RANGE + 1)
+        for side in ('CE', 'PE')
+    )
 
 
 class BarData:
     """1-minute OHLCV bar with VWAP"""
+
+    __slots__ = ('timestamp', 'open', 'high', 'low', 'close', 'volume', 'vwap', 'tick_count', 'minute_idx')
     
     def __init__(self, timestamp):
         self.timestamp = timestamp
-        self.open = None
-        self.high = None
-        self.low = None
-        self.close = None
+        # NaN/inf sentinels until the first tick, so update_tick needs plain compares
+        self.open = math.nan
+        self.high = -math.inf
+        self.low = math.inf
+        self.close = math.nan
         self.volume = 0
         self.vwap = None
         self.tick_count = 0
+        self.minute_idx = None  # epoch minute (time_ns // NS_PER_MINUTE) for live bars
     
     def update_tick(self, ltp, volume=1):
         """Update bar with new tick data"""
-        if self.open is None:
+        if self.open != self.open:  # NaN - first tick
             self.open = ltp
-        
-        self.high = max(self.high or ltp, ltp)
-        self.low = min(self.low or ltp, ltp)
+        if ltp > self.high:
+            self.high = ltp
+        if ltp < self.low:
+            self.low = ltp
         self.close = ltp
         self.volume += volume
         self.tick_count += 1
@@ -77,24 +179,52 @@ class BarData:
     def is_valid(self):
         """Check if bar has minimum data quality"""
         return (
-            self.open is not None and
+            self.open == self.open and
             self.tick_count >= MIN_TICKS_PER_BAR and
             self.volume > 0
         )
     
     def to_dict(self):
+        has_ticks = self.open == self.open  # Sentinels are reported as None
         return {
             'timestamp': self.timestamp,
-            'open': self.open,
-            'high': self.high,
-            'low': self.low,
-            'close': self.close,
+            'open': self.open if has_ticks else None,
+            'high': self.high if has_ticks else None,
+            'low': self.low if has_ticks else None,
+            'close': self.close if has_ticks else None,
             'volume': self.volume,
             'vwap': self.vwap,
             'tick_count': self.tick_count,
         }
 
 
+class SymbolState:
+    """
+    All per-symbol pipeline state, so the tick path does one dict lookup
+
+    Guarded by the symbol's stripe lock (DataPipeline._lock_for).
+    """
+
+    __slots__ = ('symbol', 'idx', 'bars', 'current_bar', 'last_tick_ns', 'last_bar_received',
+                 'cum_pv', 'cum_vol', 'arrays', 'arrays_len')
+
+    def __init__(self, symbol, idx):
+        self.symbol = symbol
+        self.idx = idx  # Dense per-pipeline id; slot in DataPipeline._last_tick_ns
+        self.bars = deque(maxlen=MAX_BARS_PER_SYMBOL)  # Completed bars - ring buffer, oldest auto-evicted
+        self.current_bar = None  # Incomplete bar being built from ticks
+        self.last_tick_ns = 0  # time.time_ns() of last tick (0 = none since (re)connect)
+        self.last_bar_received = None  # datetime when last bar was RECEIVED (for watchdog)
+
+        # Session VWAP tracking: cumulative from market open (9:15 AM)
+        self.cum_pv = 0.0
+        self.cum_vol = 0
+
+        # SoA mirror of bars: {field: ndarray[MAX_BARS_PER_SYMBOL]}, first arrays_len entries valid
+        self.arrays = None
+        self.arrays_len = 0
+
+
 class DataPipeline:
     """
     Real-time data pipeline for options trading
@@ -107,24 +237,46 @@ class DataPipeline:
         self.client = None
         self.is_connected = False
         self.subscribed_symbols = set()
-
-        # Data storage: {symbol: [list of BarData]}
-        self.bars = defaultdict(list)
-        self.current_bars = {}  # {symbol: BarData}
-
-        # Session VWAP tracking: cumulative from market open (9:15 AM)
-        # {symbol: {'cum_pv': float, 'cum_vol': int}}
-        self.session_vwap_data = {}
-
-        # Thread safety - use RLock for reentrant locking
-        self.lock = RLock()
-
-        # Last update tracking
-        self.last_tick_time = {}  # {symbol: datetime}
-        self.last_bar_timestamp = {}  # {symbol: datetime} - when bar was RECEIVED (for watchdog)
+        # {symbol: SymbolState} accepted by the WebSocket callback (kept across reconnects).
+        # Replaced, never mutated, so the callback can read it without a lock
+        self._tick_states = {}
+        # subscribe_quote instruments for subscribed_symbols, reused as-is on reconnect
+        self._subscribe_payload = []
+
+        # Per-symbol data: bars, current bar, session VWAP, tick/bar times
+        self.state = {}  # {symbol: SymbolState}
+
+        # Watchdog view of SymbolState.last_tick_ns indexed by SymbolState.idx, so
+        # freshness scans are one vectorized compare instead of a per-symbol loop
+        self._last_tick_ns = np.zeros(64, dtype=np.int64)
+        # Same indexing: symbol has completed bars or a current bar
+        self._has_data = np.zeros(64, dtype=bool)
+        self._subscribed_idx = np.zeros(0, dtype=np.intp)  # idx of each subscribed symbol
+
+        # Subscribed symbols grouped by stripe for the get_all_* snapshots:
+        # ((stripe, ((symbol, SymbolState), ...)), ...)
+        self._subscribed_by_stripe = ()
+
+        # Thread safety:
+        # - Each SymbolState is guarded by a striped lock, see _lock_for(),
+        #   so independent symbols don't contend on the tick path
+        # - self.lock guards pipeline-wide state (subscribed_symbols, watchdog
+        #   counters, reconnect flag)
+        # - first_data_received_at is set once by the aggregator under its own
+        #   one-shot lock, so the tick path never waits on self.lock
+        # - _state_lock serializes SymbolState creation (idx allocation and
+        #   growth of the idx-indexed arrays); it is a leaf lock, taken last
+        # Lock order: self.lock before stripes; _all_stripes() takes stripes in index order
+        self.lock = Lock()
+        self._stripes = [Lock() for _ in range(LOCK_STRIPES)]
+        self._state_lock = Lock()
 
         # Watchdog tracking
         self.first_data_received_at = None
+        self._first_data_flag = False
+        self._first_data_lock = Lock()
+        self._last_bar_received_at = None  # Most recent SymbolState.last_bar_received
+        self._latest_tick_ns = 0  # Most recent SymbolState.last_tick_ns (0 = none since (re)connect)
         self.consecutive_stale_checks = 0
         self.watchdog_triggered = False
 
@@ -133,17 +285,96 @@ class DataPipeline:
         self.last_disconnect_time = None
         self.is_reconnecting = False  # Flag to prevent multiple simultaneous reconnections
         self.auto_reconnect_enabled = True  # Enable automatic reconnection
+        self._tick_event = Event()  # Set by the aggregator once ticks are applied; cleared on reconnect
 
         # Connection monitoring thread
         self.monitor_thread = None
         self.monitor_running = False
 
+        # Tick aggregation: WebSocket callback enqueues, aggregator thread builds bars
+        # Single producer (WS receive thread) / single consumer (aggregator)
+        self.tick_queue = queue.SimpleQueue()
+        self.aggregator_thread = None
+        self.aggregator_running = False
+
+        # Bar timestamp cache (aggregator thread only): one datetime per minute shared by all symbols
+        self._current_minute = None
+        self._current_minute_dt = None
+
+        # Today's (day_start, day_end, market_open, market_close) as epoch ns, see _is_market_open()
+        self._market_window = (0, 0, 0, 0)
+
         # ATM tracking for strike selection
         self.current_atm_strike = None
         self.spot_price = None
 
         logger.info("DataPipeline initialized")
 
+    def _lock_for(self, symbol):
+        """Striped lock guarding symbol's bar/tick state"""
+        return self._stripes[hash(symbol) & (LOCK_STRIPES - 1)]
+
+    def _symbol_state(self, symbol):
+        """Get or create symbol's state (callable with or without other pipeline locks held)"""
+        st = self.state.get(symbol)
+        if st is not None:
+            return st
+
+        with self._state_lock:
+            st = self.state.get(symbol)
+            if st is None:
+                idx = len(self.state)
+                if idx >= len(self._last_tick_ns):
+                    # Grow by doubling before the state is published; a tick stamped into
+                    # the old array meanwhile is only lost from the watchdog view until
+                    # that symbol's next tick
+                    self._last_tick_ns = np.concatenate(
+                        (self._last_tick_ns, np.zeros_like(self._last_tick_ns))
+                    )
+                    self._has_data = np.concatenate(
+                        (self._has_data, np.zeros_like(self._has_data))
+                    )
+                st = self.state[symbol] = SymbolState(symbol, idx)
+        return st
+
+    def _index_subscribed(self):
+        """Rebuild subscribed-symbol indices after subscribed_symbols changes (caller holds self.lock)"""
+        self._subscribed_idx = np.fromiter(
+            (self._symbol_state(symbol).idx for symbol in self.subscribed_symbols),
+            dtype=np.intp, count=len(self.subscribed_symbols)
+        )
+        self._subscribed_by_stripe = self._group_by_stripe(self.subscribed_symbols)
+
+    def _group_by_stripe(self, symbols):
+        """Group known symbols and their states by stripe lock"""
+        by_stripe = {}
+        for symbol in symbols:
+            st = self.state.get(symbol)
+            if st is None:
+                continue
+            stripe = self._lock_for(symbol)
+            entries = by_stripe.get(stripe)
+            if entries is None:
+                by_stripe[stripe] = [(symbol, st)]
+            else:
+                entries.append((symbol, st))
+        return tuple((stripe, tuple(entries)) for stripe, entries in by_stripe.items())
+
+    def _sample_symbol(self):
+        """First symbol with completed bars (used for gap checks), or None"""
+        return next((symbol for symbol, st in self.state.items() if st.bars), None)
+
+    @contextmanager
+    def _all_stripes(self):
+        """Hold every stripe lock (cross-symbol scans and resets)"""
+        for stripe in self._stripes:
+            stripe.acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(self._stripes):
+                stripe.release()
+
     def _is_market_open(self):
         """
         Check if market is currently open (data should be flowing)
@@ -151,9 +382,18 @@ class DataPipeline:
         Returns True if current time is between 9:15 AM and 3:30 PM IST.
         Used to avoid false disconnection detection after market close.
         """
-        now = datetime.now(IST)
-        current_time = now.time()
-        return MARKET_START_TIME <= current_time <= MARKET_CLOSE_TIME
+        now_ns = time_module.time_ns()
+        day_start_ns, day_end_ns, open_ns, close_ns = self._market_window
+        if not day_start_ns <= now_ns < day_end_ns:
+            # First call of the IST day: compute the session bounds once
+            today = datetime.now(IST).date()
+            self._market_window = day_start_ns, day_end_ns, open_ns, close_ns = (
+                _ist_epoch_ns(today, time.min),
+                _ist_epoch_ns(today + timedelta(days=1), time.min),
+                _ist_epoch_ns(today, MARKET_START_TIME),
+                _ist_epoch_ns(today, MARKET_CLOSE_TIME),
+            )
+        return open_ns <= now_ns <= close_ns
 
     def connect(self):
         """Initialize OpenAlgo client and connect WebSocket"""
@@ -178,6 +418,29 @@ class DataPipeline:
             self.is_connected = False
             raise
     
+    def _fetch_history(self, symbols, start_date, end_date):
+        """
+        Fetch 1-min history for symbols concurrently (I/O bound HTTP calls)
+
+        Yields:
+            (symbol, future) in completion order - future.result() returns the
+            DataFrame or re-raises the fetch error
+        """
+        with ThreadPoolExecutor(max_workers=HISTORY_FETCH_WORKERS) as executor:
+            futures = {
+                executor.submit(
+                    self.client.history,
+                    symbol=symbol,
+                    exchange=EXCHANGE,
+                    interval='1m',
+                    start_date=start_date,
+                    end_date=end_date
+                ): symbol
+                for symbol in symbols
+            }
+            for future in as_completed(futures):
+                yield futures[future], future
+
     def load_historical_data(self, symbols):
         """
         Load today's historical 1-min bars for all symbols
@@ -213,16 +476,10 @@ class DataPipeline:
         successful = 0
         failed = 0
         
-        for symbol in symbols:
+        for symbol, future in self._fetch_history(symbols, start_date, end_date):
             try:
-                # Fetch 1-min historical data for today
-                df = self.client.history(
-                    symbol=symbol,
-                    exchange=EXCHANGE,
-                    interval='1m',
-                    start_date=start_date,
-                    end_date=end_date
-                )
+                # 1-min historical data for today
+                df = future.result()
                 
                 if df.empty:
                     logger.warning(f"No historical data for {symbol}")
@@ -241,52 +498,20 @@ class DataPipeline:
                         logger.info(f"[HIST] Sample index: {df.index[0]}")
                         logger.info(f"[HIST] Last historical bar: {df.index[-1]}")
                 
-                # Convert to bars and populate history
-                with self.lock:
-                    # Initialize session VWAP tracking for this symbol
-                    cum_pv = 0.0
-                    cum_vol = 0
-
-                    for idx, row in df.iterrows():
-                        # Datetime is the index, not a column
-                        bar_time = idx
-
-                        if isinstance(bar_time, str):
-                            bar_time = datetime.fromisoformat(bar_time)
-                        if bar_time.tzinfo is None:
-                            bar_time = IST.localize(bar_time)
-
-                        # Round to minute
-                        bar_timestamp = bar_time.replace(second=0, microsecond=0)
-
-                        # Create BarData object (lowercase column names from OpenAlgo)
-                        bar = BarData(bar_timestamp)
-                        bar.open = row.get('open', 0)
-                        bar.high = row.get('high', 0)
-                        bar.low = row.get('low', 0)
-                        bar.close = row.get('close', 0)
-                        bar.volume = row.get('volume', 0)
-                        bar.tick_count = 10  # Assume complete bar
-
-                        # Calculate cumulative session VWAP from market open
-                        # Using typical price = (high + low + close) / 3
-                        typical_price = (bar.high + bar.low + bar.close) / 3
-                        cum_pv += typical_price * bar.volume
-                        cum_vol += bar.volume
-
-                        if cum_vol > 0:
-                            bar.vwap = cum_pv / cum_vol
-                        else:
-                            bar.vwap = typical_price
-
-                        # Add to historical bars
-                        self.bars[symbol].append(bar)
-
-                    # Store cumulative values for live bar continuation
-                    self.session_vwap_data[symbol] = {
-                        'cum_pv': cum_pv,
-                        'cum_vol': cum_vol
-                    }
+                # Vectorized OHLCV extraction (lowercase column names from OpenAlgo)
+                o, h, l, c, v = _ohlcv_columns(df)
+
+                # Cumulative session VWAP from market open
+                vwap, cum_pv, cum_vol = _cumulative_vwap(h, l, c, v)
+                bar_index = _bar_index(df.index)
+
+                # Populate history
+                with self._lock_for(symbol):
+                    st = self._symbol_state(symbol)
+                    self._extend_bars(
+                        st, bar_index.to_pydatetime(), o, h, l, c, v, vwap, cum_pv, cum_vol,
+                        tick_count=10, epoch=bar_index.asi8 / NS_PER_SECOND
+                    )
 
                 successful += 1
                 
@@ -298,14 +523,15 @@ class DataPipeline:
         
         # Log bar counts and gap detection
         if successful > 0:
-            sample_symbol = list(self.bars.keys())[0] if self.bars else None
+            sample_symbol = self._sample_symbol()
             if sample_symbol:
-                bar_count = len(self.bars[sample_symbol])
+                sample_bars = self.state[sample_symbol].bars
+                bar_count = len(sample_bars)
                 logger.info(f"[HIST] Bar history: {bar_count} bars per symbol (from 9:15 AM onwards)")
                 
                 # Check for gap between last historical bar and current time
-                if self.bars[sample_symbol]:
-                    last_historical_bar = self.bars[sample_symbol][-1]
+                if sample_bars:
+                    last_historical_bar = sample_bars[-1]
                     gap_minutes = int((current_minute - last_historical_bar.timestamp).total_seconds() / 60)
                     
                     if gap_minutes > 1:
@@ -343,16 +569,12 @@ class DataPipeline:
         current_minute = now.replace(second=0, microsecond=0)
         
         # Get a sample symbol to check for gaps
-        if not self.bars:
+        sample_symbol = self._sample_symbol()
+        if sample_symbol is None:
             logger.debug("[GAP-FILL] No bars loaded yet, skipping gap fill")
             return
         
-        sample_symbol = list(self.bars.keys())[0]
-        if not self.bars[sample_symbol]:
-            logger.debug("[GAP-FILL] No bars for sample symbol, skipping gap fill")
-            return
-        
-        last_bar = self.bars[sample_symbol][-1]
+        last_bar = self.state[sample_symbol].bars[-1]
         last_bar_minute = last_bar.timestamp
         
         # Calculate gap in minutes
@@ -390,22 +612,18 @@ class DataPipeline:
         filled_count = 0
         failed_count = 0
         
-        for symbol in self.bars.keys():
+        symbols_with_bars = [symbol for symbol, st in self.state.items() if st.bars]
+        for symbol, future in self._fetch_history(symbols_with_bars, start_date, end_date):
             try:
-                # Fetch today's history (should now include the missing bars)
-                df = self.client.history(
-                    symbol=symbol,
-                    exchange=EXCHANGE,
-                    interval='1m',
-                    start_date=start_date,
-                    end_date=end_date
-                )
+                # Today's history (should now include the missing bars)
+                df = future.result()
                 
                 if df.empty:
                     continue
                 
                 # Filter to bars after last_bar_minute
-                last_bar_time = self.bars[symbol][-1].timestamp if self.bars[symbol] else None
+                st = self.state[symbol]
+                last_bar_time = st.bars[-1].timestamp if st.bars else None
                 if last_bar_time is None:
                     continue
                 
@@ -413,76 +631,27 @@ class DataPipeline:
                 
                 if missed_bars.empty:
                     continue
+
+                # Don't add bars that are in the future or current incomplete bar
+                bar_index = _bar_index(missed_bars.index)
+                current_check = datetime.now(IST).replace(second=0, microsecond=0)
+                complete = np.asarray(bar_index < current_check)
+                if not complete.all():
+                    logger.debug(
+                        f"[GAP-FILL] Skipping {int((~complete).sum())} incomplete/future bar(s) for {symbol}"
+                    )
+                    bar_index = bar_index[complete]
+                o, h, l, c, v = (col[complete] for col in _ohlcv_columns(missed_bars))
                 
                 # Add missed bars to history
-                with self.lock:
-                    # Get current session VWAP cumulative values
-                    # 🔧 FIX: If VWAP data missing (after reconnect), recalculate from existing bars
-                    if symbol not in self.session_vwap_data:
-                        logger.warning(
-                            f"[GAP-FILL] {symbol}: VWAP data missing - recalculating from "
-                            f"{len(self.bars[symbol])} existing bars"
-                        )
-                        cum_pv = 0.0
-                        cum_vol = 0
-                        for existing_bar in self.bars[symbol]:
-                            typical_price = (existing_bar.high + existing_bar.low + existing_bar.close) / 3
-                            cum_pv += typical_price * existing_bar.volume
-                            cum_vol += existing_bar.volume
-                        self.session_vwap_data[symbol] = {'cum_pv': cum_pv, 'cum_vol': cum_vol}
-                        logger.info(
-                            f"[GAP-FILL] {symbol}: VWAP restored "
-                            f"(cum_pv={cum_pv:.2f}, cum_vol={cum_vol})"
-                        )
-                    else:
-                        vwap_data = self.session_vwap_data[symbol]
-                        cum_pv = vwap_data['cum_pv']
-                        cum_vol = vwap_data['cum_vol']
-
-                    for idx, row in missed_bars.iterrows():
-                        bar_time = idx
-
-                        if isinstance(bar_time, str):
-                            bar_time = datetime.fromisoformat(bar_time)
-                        if bar_time.tzinfo is None:
-                            bar_time = IST.localize(bar_time)
-
-                        bar_timestamp = bar_time.replace(second=0, microsecond=0)
-
-                        # Don't add bars that are in the future or current incomplete bar
-                        current_check = datetime.now(IST).replace(second=0, microsecond=0)
-                        if bar_timestamp >= current_check:
-                            logger.debug(
-                                f"[GAP-FILL] Skipping incomplete/future bar @ {bar_timestamp.strftime('%H:%M')}"
-                            )
-                            continue
-
-                        bar = BarData(bar_timestamp)
-                        bar.open = row.get('open', 0)
-                        bar.high = row.get('high', 0)
-                        bar.low = row.get('low', 0)
-                        bar.close = row.get('close', 0)
-                        bar.volume = row.get('volume', 0)
-                        bar.tick_count = 10  # Assume complete bar
-
-                        # Calculate cumulative session VWAP
-                        typical_price = (bar.high + bar.low + bar.close) / 3
-                        cum_pv += typical_price * bar.volume
-                        cum_vol += bar.volume
-
-                        if cum_vol > 0:
-                            bar.vwap = cum_pv / cum_vol
-                        else:
-                            bar.vwap = typical_price
-
-                        self.bars[symbol].append(bar)
-                        filled_count += 1
-
-                    # Update session VWAP cumulative values
-                    self.session_vwap_data[symbol] = {
-                        'cum_pv': cum_pv,
-                        'cum_vol': cum_vol
-                    }
+                with self._lock_for(symbol):
+                    # Continue the session VWAP from the symbol's running totals
+                    vwap, cum_pv, cum_vol = _cumulative_vwap(h, l, c, v, st.cum_pv, st.cum_vol)
+                    filled_count += self._extend_bars(
+                        st, bar_index.to_pydatetime(), o, h, l, c, v, vwap, cum_pv, cum_vol,
+                        tick_count=10,  # Assume complete bars
+                        epoch=bar_index.asi8 / NS_PER_SECOND
+                    )
                 
                 if len(missed_bars) > 0:
                     logger.debug(f"[GAP-FILL] Added {len(missed_bars)} bars for {symbol}")
@@ -498,9 +667,10 @@ class DataPipeline:
             )
             
             # Log updated bar count
-            if sample_symbol in self.bars:
-                new_bar_count = len(self.bars[sample_symbol])
-                new_last_bar = self.bars[sample_symbol][-1]
+            sample_bars = self.state[sample_symbol].bars
+            if sample_bars:
+                new_bar_count = len(sample_bars)
+                new_last_bar = sample_bars[-1]
                 logger.info(
                     f"[GAP-FILL] Updated history: {new_bar_count} bars, "
                     f"last bar @ {new_last_bar.timestamp.strftime('%H:%M')}"
@@ -523,17 +693,7 @@ class DataPipeline:
         Returns:
             List of symbols: ['NIFTY26DEC2418000CE', 'NIFTY26DEC2418000PE', ...]
         """
-        symbols = []
-        strike_interval = 50  # NIFTY strike interval
-        
-        for i in range(-STRIKE_SCAN_RANGE, STRIKE_SCAN_RANGE + 1):
-            strike = atm_strike + (i * strike_interval)
-            
-            # Generate CE and PE symbols
-            ce_symbol = f"NIFTY{expiry_date}{strike}CE"
-            pe_symbol = f"NIFTY{expiry_date}{strike}PE"
-            
-            symbols.extend([ce_symbol, pe_symbol])
+        symbols = list(_option_symbols(atm_strike, expiry_date))
         
         logger.info(f"Generated {len(symbols)} option symbols around ATM {atm_strike}")
         logger.info(f"Sample symbols: {symbols[:3]}")  # Debug: show first 3 symbols
@@ -550,12 +710,25 @@ class DataPipeline:
             logger.error("Cannot subscribe: WebSocket not connected")
             return
 
+        # Interned symbols make every per-symbol dict lookup an identity hit
+        symbols = [sys.intern(symbol) for symbol in symbols]
+
         instruments = [
             {"exchange": EXCHANGE, "symbol": symbol}
             for symbol in symbols
         ]
 
         try:
+            for symbol in symbols:
+                self._symbol_state(symbol)
+            tick_states = dict(self._tick_states)
+            tick_states.update((symbol, self.state[symbol]) for symbol in symbols)
+            self._tick_states = tick_states
+
+            # Aggregator must be draining before the first tick arrives
+            if not self.aggregator_running:
+                self.start_aggregator()
+
             # Subscribe to quote mode (LTP, OHLC, Volume)
             self.client.subscribe_quote(
                 instruments,
@@ -563,7 +736,11 @@ class DataPipeline:
             )
 
             with self.lock:
-                self.subscribed_symbols.update(symbols)
+                for instrument in instruments:
+                    if instrument["symbol"] not in self.subscribed_symbols:
+                        self.subscribed_symbols.add(instrument["symbol"])
+                        self._subscribe_payload.append(instrument)
+                self._index_subscribed()
 
             logger.info(f"Subscribed to {len(symbols)} option symbols")
 
@@ -575,6 +752,83 @@ class DataPipeline:
             logger.error(f"Failed to subscribe to options: {e}")
             raise
 
+    def start_aggregator(self):
+        """Start background thread that applies queued ticks to bars"""
+        if self.aggregator_running:
+            return
+
+        self.aggregator_running = True
+        self.aggregator_thread = Thread(target=self._aggregator_loop, daemon=True)
+        self.aggregator_thread.start()
+        logger.info("[AGGREGATOR] Tick aggregator started")
+
+    def stop_aggregator(self):
+        """Stop the tick aggregator thread (pending ticks are applied first)"""
+        self.aggregator_running = False
+        self.tick_queue.put(None)  # Wake the consumer
+        if self.aggregator_thread:
+            self.aggregator_thread.join(timeout=5)
+        logger.info("[AGGREGATOR] Tick aggregator stopped")
+
+    def _aggregator_loop(self):
+        """Drain the tick queue in batches and apply ticks to bars"""
+        get = self.tick_queue.get
+        get_nowait = self.tick_queue.get_nowait
+
+        while True:
+            batch = [get()]
+            try:
+                while len(batch) < TICK_BATCH_SIZE:
+                    batch.append(get_nowait())
+            except queue.Empty:
+                pass
+
+            try:
+                self._apply_ticks_batch(batch)
+            except Exception:
+                # Drop the batch, not the thread: a dead aggregator stops all bars
+                logger.exception("[AGGREGATOR] Failed to apply tick batch (%d ticks)", len(batch))
+
+            if not self.aggregator_running and self.tick_queue.empty():
+                break
+
+    def _apply_ticks_batch(self, batch):
+        """
+        Apply a batch of (SymbolState, ltp, volume, received_at_ns) ticks
+
+        Ticks are grouped by symbol (arrival order kept within each symbol), so
+        each symbol's stripe lock is taken once per batch instead of per tick.
+        """
+        by_state = {}
+        for tick in batch:
+            if tick is None:
+                continue
+            ticks = by_state.get(tick[0])
+            if ticks is None:
+                by_state[tick[0]] = [tick]
+            else:
+                ticks.append(tick)
+
+        if not by_state:
+            return
+
+        # Track first data received (lock-free check after the first batch)
+        if not self._first_data_flag:
+            with self._first_data_lock:
+                if not self._first_data_flag:
+                    self.first_data_received_at = datetime.now(IST)
+                    self._first_data_flag = True
+
+        apply_symbol_ticks = self._apply_symbol_ticks
+        lock_for = self._lock_for
+        for st, ticks in by_state.items():
+            with lock_for(st.symbol):
+                apply_symbol_ticks(st, ticks)
+
+        self._latest_tick_ns = max(ticks[-1][3] for ticks in by_state.values())
+        if not self._tick_event.is_set():
+            self._tick_event.set()
+
     def start_connection_monitor(self):
         """
         Start background thread to monitor WebSocket connection health
@@ -633,6 +887,7 @@ class DataPipeline:
                 with self.lock:
                     if self.subscribed_symbols and self.first_data_received_at is not None:
                         now = datetime.now(IST)
+                        now_ns = time_module.time_ns()
 
                         # Skip data staleness checks if market is closed
                         # After 3:30 PM, WebSocket stops sending data - this is expected behavior
@@ -645,9 +900,9 @@ class DataPipeline:
 
                         # 🔧 FIX D: No-tick heartbeat detection
                         # Check if ANY ticks received recently (socket alive but no ticks = common Upstox issue)
-                        if self.last_tick_time:
-                            most_recent_tick = max(self.last_tick_time.values())
-                            seconds_since_any_tick = (now - most_recent_tick).total_seconds()
+                        most_recent_tick = self._latest_tick_ns
+                        if most_recent_tick:
+                            seconds_since_any_tick = (now_ns - most_recent_tick) / NS_PER_SECOND
 
                             # If NO ticks at all for 15 seconds during market hours, reconnect
                             if seconds_since_any_tick > 15:
@@ -659,13 +914,7 @@ class DataPipeline:
                                 continue
 
                         # Count fresh symbols
-                        fresh_count = 0
-                        for symbol in self.subscribed_symbols:
-                            last_tick = self.last_tick_time.get(symbol)
-                            if last_tick:
-                                age = (now - last_tick).total_seconds()
-                                if age <= MAX_TICK_AGE_SECONDS:
-                                    fresh_count += 1
+                        fresh_count = self._fresh_symbol_count(now_ns)
 
                         total_symbols = len(self.subscribed_symbols)
                         coverage = fresh_count / total_symbols if total_symbols > 0 else 0
@@ -721,76 +970,208 @@ class DataPipeline:
                 'timestamp': '2024-12-20 10:15:30'
             }
         }
+
+        Runs on the WebSocket receive thread, so it only parses the quote and
+        enqueues it; bar aggregation happens on the aggregator thread.
         """
         try:
-            symbol = data.get('symbol')
-            quote_data = data.get('data', {})
-            
-            ltp = quote_data.get('ltp')
-            volume = quote_data.get('volume', 1)
-            
-            if not symbol or ltp is None:
+            # Resolve the symbol's state once here; drop symbols we never subscribed to
+            st = self._tick_states.get(data['symbol'])
+            if st is None:
                 return
-            
-            now = datetime.now(IST)
-            
-            # Update last tick time
-            with self.lock:
-                self.last_tick_time[symbol] = now
-                
-                # Track first data received
-                if self.first_data_received_at is None:
-                    self.first_data_received_at = now
-            
-            # Get current minute timestamp (rounded down)
-            bar_timestamp = now.replace(second=0, microsecond=0)
-            
-            with self.lock:
-                # Check if we need to start a new bar
-                current_bar = self.current_bars.get(symbol)
-
-                if current_bar is None or current_bar.timestamp != bar_timestamp:
-                    # Save completed bar
-                    if current_bar is not None and current_bar.is_valid():
-                        # Update session VWAP with completed bar's contribution
-                        vwap_data = self.session_vwap_data.get(symbol, {'cum_pv': 0.0, 'cum_vol': 0})
-                        typical_price = (current_bar.high + current_bar.low + current_bar.close) / 3
-                        vwap_data['cum_pv'] += typical_price * current_bar.volume
-                        vwap_data['cum_vol'] += current_bar.volume
-
-                        # Calculate and set session VWAP for this bar
-                        if vwap_data['cum_vol'] > 0:
-                            current_bar.vwap = vwap_data['cum_pv'] / vwap_data['cum_vol']
-                        else:
-                            current_bar.vwap = typical_price
+            quote_data = data['data']
+            ltp = quote_data['ltp']
+            # Drop missing/non-positive prices (bad prints, pre-open zeros)
+            if ltp is None or ltp <= 0:
+                return
+            volume = quote_data.get('volume', 1)
+        except (KeyError, TypeError, AttributeError):
+            return
 
-                        # Store updated cumulative values
-                        self.session_vwap_data[symbol] = vwap_data
+        self.tick_queue.put((st, ltp, volume, time_module.time_ns()))
 
-                        self.bars[symbol].append(current_bar)
-                        # Store when bar was RECEIVED, not bar's timestamp (for watchdog)
-                        self.last_bar_timestamp[symbol] = datetime.now(IST)
-                        logger.info(f"[BAR] {symbol} | O:{current_bar.open:.2f} H:{current_bar.high:.2f} L:{current_bar.low:.2f} C:{current_bar.close:.2f}")
+    def _apply_symbol_ticks(self, st, ticks):
+        """
+        Apply one symbol's ticks from a batch in arrival order (aggregator thread, stripe lock held)
 
-                        # Prune bars if threshold exceeded
-                        if len(self.bars[symbol]) > BAR_PRUNING_THRESHOLD:
-                            removed = len(self.bars[symbol]) - MAX_BARS_PER_SYMBOL
-                            self.bars[symbol] = self.bars[symbol][-MAX_BARS_PER_SYMBOL:]
-                            logger.debug(
-                                f"Pruned {removed} old bars from {symbol} "
-                                f"(kept {MAX_BARS_PER_SYMBOL})"
-                            )
+        The current bar and its minute stay in locals between ticks and are only
+        reloaded on rollover. Last-tick time only advances for ticks that were applied.
 
-                    # Start new bar
-                    current_bar = BarData(bar_timestamp)
-                    self.current_bars[symbol] = current_bar
+        Args:
+            ticks: (SymbolState, ltp, volume, received_at_ns) tuples, received_at_ns
+                   being time.time_ns() when the WebSocket callback got the tick
+        """
+        bar = st.current_bar
+        bar_minute = bar.minute_idx if bar is not None else None
+
+        for _, ltp, volume, now_ns in ticks:
+            try:
+                # Bars are matched on the integer epoch minute
+                minute = now_ns // NS_PER_MINUTE
+                if minute != bar_minute:
+                    bar = self._start_bar(st, minute)
+                    bar_minute = minute
+                bar.update_tick(ltp, volume)
+
+                # Update last tick time
+                st.last_tick_ns = now_ns
+                self._last_tick_ns[st.idx] = now_ns
+            except Exception as e:
+                logger.error(f"Error processing quote update: {e}")
+
+    def _start_bar(self, st, minute):
+        """Close symbol's current bar (if any) and start one for minute (stripe lock held)"""
+        current_bar = st.current_bar
+
+        # Save completed bar
+        if current_bar is not None and current_bar.is_valid():
+            self._close_bar(st, current_bar)
+            # Store when bar was RECEIVED, not bar's timestamp (for watchdog)
+            st.last_bar_received = self._last_bar_received_at = datetime.now(IST)
+            # Lazy %-formatting: no string is built unless INFO is enabled
+            logger.info(
+                "[BAR] %s | O:%.2f H:%.2f L:%.2f C:%.2f",
+                st.symbol, current_bar.open, current_bar.high, current_bar.low, current_bar.close
+            )
+
+        # Start new bar (timestamp datetime materialized once per minute)
+        if minute != self._current_minute:
+            self._current_minute_dt = datetime.fromtimestamp(minute * 60, IST)
+            self._current_minute = minute
+        current_bar = BarData(self._current_minute_dt)
+        current_bar.minute_idx = minute
+        st.current_bar = current_bar
+        self._has_data[st.idx] = True
+        return current_bar
+
+    def _close_bar(self, st, bar):
+        """
+        Fold a completed live bar into the session VWAP and append it to history
+
+        Caller holds the symbol's stripe lock.
+        """
+        volume = bar.volume
+        typical_price = (bar.high + bar.low + bar.close) / 3
+        cum_pv = st.cum_pv + typical_price * volume
+        cum_vol = st.cum_vol + volume
+        st.cum_pv = cum_pv
+        st.cum_vol = cum_vol
+
+        # Session VWAP for this bar
+        bar.vwap = cum_pv / cum_vol if cum_vol > 0 else typical_price
+
+        self._append_bar(st, bar)
+
+    def _extend_bar_arrays(self, st, columns):
+        """
+        Append columns (ordered as BAR_ARRAY_FIELDS) to the symbol's SoA arrays
+
+        Arrays are pre-allocated to MAX_BARS_PER_SYMBOL; when the slot would
+        overflow, the oldest bars are evicted. Caller must hold the symbol's stripe lock.
+        """
+        arrays = st.arrays
+        if arrays is None:
+            arrays = {field: np.empty(MAX_BARS_PER_SYMBOL, dtype=BAR_ARRAY_DTYPES[field]) for field in BAR_ARRAY_FIELDS}
+            st.arrays = arrays
+
+        count = min(len(columns[0]), MAX_BARS_PER_SYMBOL)
+        size = st.arrays_len
+        overflow = size + count - MAX_BARS_PER_SYMBOL
+        if overflow > 0:
+            # Slide retained bars to the front
+            for array in arrays.values():
+                array[:size - overflow] = array[overflow:size]
+            size -= overflow
+
+        for field, column in zip(BAR_ARRAY_FIELDS, columns):
+            column = column[len(column) - count:]
+            if field == 'volume':
+                column = np.minimum(column, INT32_MAX)  # Saturate rather than wrap
+            arrays[field][size:size + count] = column
+        st.arrays_len = size + count
+        self._has_data[st.idx] = st.arrays_len > 0
+
+    def _append_bar(self, st, bar):
+        """Append a completed bar to history and its SoA mirror (caller holds symbol stripe)"""
+        st.bars.append(bar)  # Ring buffer evicts the oldest bar when full
+        self._extend_bar_arrays(st, (
+            (bar.timestamp.timestamp(),), (bar.open,), (bar.high,), (bar.low,),
+            (bar.close,), (bar.volume,), (bar.vwap,), (st.cum_pv,), (st.cum_vol,)
+        ))
+
+    def _extend_bars(self, st, bar_timestamps, o, h, l, c, v, vwap, cum_pv, cum_vol, tick_count, epoch=None):
+        """
+        Append a block of completed bars from column arrays (caller holds symbol stripe)
+
+        cum_pv/cum_vol: session VWAP totals per bar (from _cumulative_vwap); the
+        last entries become the symbol's running totals for live bars.
+        epoch: bar timestamps as epoch seconds, if already available as an array
+
+        Returns:
+            Number of bars added
+        """
+        bars = st.bars
+        for bar_timestamp, bo, bh, bl, bc, bv, bvwap in zip(
+            bar_timestamps, o.tolist(), h.tolist(), l.tolist(),
+            c.tolist(), v.tolist(), vwap.tolist()
+        ):
+            bar = BarData(bar_timestamp)
+            bar.open = bo
+            bar.high = bh
+            bar.low = bl
+            bar.close = bc
+            bar.volume = bv
+            bar.vwap = bvwap
+            bar.tick_count = tick_count
+            bars.append(bar)
+
+        if epoch is None:
+            epoch = np.array([ts.timestamp() for ts in bar_timestamps], dtype=np.float64)
+        self._extend_bar_arrays(st, (epoch, o, h, l, c, v, vwap, cum_pv, cum_vol))
+        if len(epoch):
+            st.cum_pv = float(cum_pv[-1])
+            st.cum_vol = float(cum_vol[-1])
+        return len(epoch)
+
+    def get_bar_arrays(self, symbol):
+        """
+        Get completed bars for symbol as parallel NumPy arrays
+
+        Returns:
+            Dict of {field: ndarray} views (see BAR_ARRAY_FIELDS), empty if no bars.
+            Views share memory with the pipeline - copy before holding across bars.
+        """
+        with self._lock_for(symbol):
+            st = self.state.get(symbol)
+            if st is None or st.arrays is None:
+                return {}
+            size = st.arrays_len
+            return {field: array[:size] for field, array in st.arrays.items()}
+
+    def ohlcv_arrays(self, symbol, n=None):
+        """
+        Get the last n completed bars for symbol as OHLCV arrays
+
+        Indicator code should vectorize over these instead of calling
+        BarData.to_dict() per bar.
+
+        Args:
+            symbol: Option symbol
+            n: Number of most recent bars (None = all)
+
+        Returns:
+            Tuple of ndarray views (opens, highs, lows, closes, volumes, vwaps),
+            empty arrays if no bars. Copy before holding across bars.
+        """
+        fields = ('open', 'high', 'low', 'close', 'volume', 'vwap')
+        with self._lock_for(symbol):
+            st = self.state.get(symbol)
+            if st is None or st.arrays is None:
+                return tuple(np.empty(0) for _ in fields)
+            end = st.arrays_len
+            start = 0 if n is None else max(end - n, 0)
+            return tuple(st.arrays[field][start:end] for field in fields)
 
-                # Update current bar with tick
-                current_bar.update_tick(ltp, volume)
-            
-        except Exception as e:
-            logger.error(f"Error processing quote update: {e}")
-    
     def get_latest_bar(self, symbol):
         """
         Get latest completed bar for symbol
@@ -798,9 +1179,9 @@ class DataPipeline:
         Returns:
             BarData object or None if no bars available
         """
-        with self.lock:
-            bars = self.bars.get(symbol, [])
-            return bars[-1] if bars else None
+        with self._lock_for(symbol):
+            st = self.state.get(symbol)
+            return st.bars[-1] if st is not None and st.bars else None
     
     def get_current_bar(self, symbol):
         """
@@ -809,8 +1190,9 @@ class DataPipeline:
         Returns:
             BarData object or None
         """
-        with self.lock:
-            return self.current_bars.get(symbol)
+        with self._lock_for(symbol):
+            st = self.state.get(symbol)
+            return st.current_bar if st is not None else None
     
     def get_bars(self, symbol, count=100):
         """
@@ -823,9 +1205,12 @@ class DataPipeline:
         Returns:
             List of BarData objects
         """
-        with self.lock:
-            bars = self.bars.get(symbol, [])
-            return bars[-count:] if bars else []
+        with self._lock_for(symbol):
+            st = self.state.get(symbol)
+            if st is None or not st.bars:
+                return []
+            bars = st.bars
+            return list(islice(bars, max(len(bars) - count, 0), None))
     
     def get_bars_for_symbol(self, symbol):
         """
@@ -835,55 +1220,77 @@ class DataPipeline:
             symbol: Option symbol
         
         Returns:
-            List of BarData objects
+            List of BarData objects (snapshot copy of the ring buffer)
         """
-        with self.lock:
-            return self.bars.get(symbol, [])
+        with self._lock_for(symbol):
+            st = self.state.get(symbol)
+            return list(st.bars) if st is not None else []
     
-    def get_all_latest_bars(self):
+    def get_all_latest_bars(self, symbols=None):
         """
         Get latest COMPLETED bar for all subscribed symbols
 
+        Args:
+            symbols: Only these symbols (default: all subscribed)
+
         Returns:
             Dict {symbol: BarData}
         """
-        result = {}
-        with self.lock:
-            for symbol in self.subscribed_symbols:
-                bar = self.get_latest_bar(symbol)
-                if bar:
-                    result[symbol] = bar
-        return result
+        return self._read_symbols(lambda st: st.bars[-1] if st.bars else None, symbols)
 
-    def get_all_current_bars(self):
+    def get_all_current_bars(self, symbols=None):
         """
         Get current INCOMPLETE bar for all subscribed symbols (real-time ticks)
 
+        Args:
+            symbols: Only these symbols (default: all subscribed)
+
         Returns:
             Dict {symbol: BarData}
         """
+        return self._read_symbols(lambda st: st.current_bar, symbols)
+
+    def _read_symbols(self, read, symbols=None):
+        """
+        Apply read(state) per symbol, taking each stripe lock once
+
+        Returns:
+            Dict {symbol: value} for symbols where read() returned a value
+        """
+        if symbols is None:
+            with self.lock:
+                groups = self._subscribed_by_stripe
+        else:
+            groups = self._group_by_stripe(symbols)
+
         result = {}
-        with self.lock:
-            for symbol in self.subscribed_symbols:
-                bar = self.get_current_bar(symbol)
-                if bar:
-                    result[symbol] = bar
+        for stripe, entries in groups:
+            with stripe:
+                for symbol, st in entries:
+                    value = read(st)
+                    if value is not None:
+                        result[symbol] = value
         return result
 
     def is_data_stale(self, symbol, max_age_seconds=MAX_TICK_AGE_SECONDS):
         """Check if data for symbol is stale (no recent ticks)"""
-        with self.lock:
+        with self._lock_for(symbol):
             return self._is_data_stale_unlocked(symbol, max_age_seconds)
     
     def _is_data_stale_unlocked(self, symbol, max_age_seconds=MAX_TICK_AGE_SECONDS):
-        """Internal version without lock - must be called with lock held"""
-        last_tick = self.last_tick_time.get(symbol)
-        if last_tick is None:
+        """Internal version without lock - must be called with the symbol stripe (or all stripes) held"""
+        st = self.state.get(symbol)
+        if st is None or not st.last_tick_ns:
             return True
         
-        age = (datetime.now(IST) - last_tick).total_seconds()
+        age = (time_module.time_ns() - st.last_tick_ns) / NS_PER_SECOND
         return age > max_age_seconds
     
+    def _fresh_symbol_count(self, now_ns, max_age_seconds=MAX_TICK_AGE_SECONDS):
+        """Number of subscribed symbols with a tick in the last max_age_seconds (caller holds self.lock)"""
+        fresh_after_ns = now_ns - int(max_age_seconds * NS_PER_SECOND)
+        return int(np.count_nonzero(self._last_tick_ns[self._subscribed_idx] >= fresh_after_ns))
+
     def get_health_status(self):
         """
         Get pipeline health status
@@ -894,10 +1301,8 @@ class DataPipeline:
         with self.lock:
             total_symbols = len(self.subscribed_symbols)
             # Count symbols with either completed bars OR current bars (ticks received)
-            symbols_with_data = len([s for s in self.subscribed_symbols 
-                                    if self.bars.get(s) or self.current_bars.get(s)])
-            # Use internal unlocked version to avoid deadlock
-            stale_symbols = len([s for s in self.subscribed_symbols if self._is_data_stale_unlocked(s)])
+            symbols_with_data = int(np.count_nonzero(self._has_data[self._subscribed_idx]))
+            stale_symbols = total_symbols - self._fresh_symbol_count(time_module.time_ns())
             
             return {
                 'connected': self.is_connected,
@@ -931,6 +1336,8 @@ class DataPipeline:
         if not self._is_market_open():
             return True, ""
 
+        # Tick and bar times are read from the watchdog mirrors, so symbol stripes
+        # (and the aggregator) are not held up by this check
         with self.lock:
             # Skip check if no data received yet (startup phase)
             if self.first_data_received_at is None:
@@ -941,10 +1348,8 @@ class DataPipeline:
             if total_symbols == 0:
                 return True, ""  # No symbols yet
             
-            fresh_symbols = 0
-            for symbol in self.subscribed_symbols:
-                if not self._is_data_stale_unlocked(symbol, max_age_seconds=MAX_TICK_AGE_SECONDS):
-                    fresh_symbols += 1
+            now_ns = time_module.time_ns()
+            fresh_symbols = self._fresh_symbol_count(now_ns)
             
             data_coverage = fresh_symbols / total_symbols
             
@@ -965,17 +1370,17 @@ class DataPipeline:
                 self.consecutive_stale_checks = 0
             
             # Check 2: Stale data timeout (no fresh ticks in 30s)
-            if self.last_tick_time:
-                latest_tick = max(self.last_tick_time.values())
-                time_since_last_tick = (now - latest_tick).total_seconds()
+            latest_tick = self._latest_tick_ns
+            if latest_tick:
+                time_since_last_tick = (now_ns - latest_tick) / NS_PER_SECOND
                 
                 if time_since_last_tick > STALE_DATA_TIMEOUT:
                     self.watchdog_triggered = True
                     return False, f"NO_FRESH_TICKS:{time_since_last_tick:.0f}s"
             
             # Check 3: Time since last bar received (not bar timestamp)
-            if self.last_bar_timestamp:
-                latest_bar_received = max(self.last_bar_timestamp.values())
+            latest_bar_received = self._last_bar_received_at
+            if latest_bar_received is not None:
                 time_since_bar = (now - latest_bar_received).total_seconds()
 
                 if time_since_bar > MAX_BAR_AGE_SECONDS:
@@ -1054,17 +1459,25 @@ class DataPipeline:
                     logger.info(f"[RECONNECT] ✅ WebSocket connected on attempt {attempt}")
 
                     # 🔧 FIX B: Reset bar state to prevent frozen bars
-                    with self.lock:
+                    with self.lock, self._all_stripes():
                         # Clear current incomplete bars (will be rebuilt from fresh ticks)
-                        old_current_bars = len(self.current_bars)
-                        self.current_bars.clear()
-                        logger.info(f"[RECONNECT] Cleared {old_current_bars} incomplete bars")
-
                         # 🔧 FIX C: Reset tick and bar timestamps (force fresh data validation)
-                        old_tick_count = len(self.last_tick_time)
-                        old_bar_count = len(self.last_bar_timestamp)
-                        self.last_tick_time.clear()
-                        self.last_bar_timestamp.clear()
+                        old_current_bars = old_tick_count = old_bar_count = 0
+                        for st in self.state.values():
+                            if st.current_bar is not None:
+                                old_current_bars += 1
+                                st.current_bar = None
+                            if st.last_tick_ns:
+                                old_tick_count += 1
+                                st.last_tick_ns = 0
+                            if st.last_bar_received is not None:
+                                old_bar_count += 1
+                                st.last_bar_received = None
+                            self._has_data[st.idx] = bool(st.bars)
+                        self._last_tick_ns.fill(0)
+                        self._latest_tick_ns = 0
+                        self._last_bar_received_at = None
+                        logger.info(f"[RECONNECT] Cleared {old_current_bars} incomplete bars")
                         logger.info(
                             f"[RECONNECT] Reset timestamps "
                             f"(ticks: {old_tick_count}, bars: {old_bar_count})"
@@ -1072,23 +1485,21 @@ class DataPipeline:
 
                         # Clear subscribed_symbols before resubscribing
                         self.subscribed_symbols.clear()
+                        self._index_subscribed()
+                        self._tick_event.clear()
 
                     # 🔧 FIX A: Force resubscription (CRITICAL - Upstox drops subs silently)
                     logger.info(f"[RECONNECT] Resubscribing to {len(symbols_to_resubscribe)} symbols...")
 
-                    instruments = [
-                        {"exchange": EXCHANGE, "symbol": symbol}
-                        for symbol in symbols_to_resubscribe
-                    ]
-
                     try:
                         self.client.subscribe_quote(
-                            instruments,
+                            self._subscribe_payload,
                             on_data_received=self._on_quote_update
                         )
 
                         with self.lock:
                             self.subscribed_symbols.update(symbols_to_resubscribe)
+                            self._index_subscribed()
 
                         logger.info(f"[RECONNECT] ✅ Resubscribed to {len(symbols_to_resubscribe)} symbols")
 
@@ -1097,13 +1508,13 @@ class DataPipeline:
                         self.is_connected = False
                         continue
 
-                    # Wait 2 seconds to verify ticks are flowing
-                    logger.info("[RECONNECT] Waiting 2s to verify tick flow...")
-                    time_module.sleep(2)
+                    # Wait up to 2 seconds for the first tick to verify ticks are flowing
+                    logger.info("[RECONNECT] Waiting up to 2s to verify tick flow...")
+                    self._tick_event.wait(timeout=2.0)
 
                     # Verify ticks are actually arriving
-                    with self.lock:
-                        tick_count = len(self.last_tick_time)
+                    with self._all_stripes():
+                        tick_count = sum(1 for st in self.state.values() if st.last_tick_ns)
 
                     if tick_count == 0:
                         logger.warning(
@@ -1177,7 +1588,8 @@ class DataPipeline:
         for symbol in self.subscribed_symbols:
             try:
                 # Get last bar timestamp for this symbol
-                last_bar_time = self.last_bar_timestamp.get(symbol)
+                st = self.state.get(symbol)
+                last_bar_time = st.last_bar_received if st is not None else None
                 
                 if last_bar_time is None:
                     # No bars yet, fetch from market open
@@ -1203,60 +1615,15 @@ class DataPipeline:
                     continue
                 
                 # Add missed bars to history
-                with self.lock:
-                    # Get current session VWAP cumulative values
-                    # 🔧 FIX: If VWAP data missing (after reconnect), recalculate from existing bars
-                    if symbol not in self.session_vwap_data:
-                        logger.warning(
-                            f"[BACKFILL] {symbol}: VWAP data missing - recalculating from "
-                            f"{len(self.bars[symbol])} existing bars"
-                        )
-                        cum_pv = 0.0
-                        cum_vol = 0
-                        for existing_bar in self.bars[symbol]:
-                            typical_price = (existing_bar.high + existing_bar.low + existing_bar.close) / 3
-                            cum_pv += typical_price * existing_bar.volume
-                            cum_vol += existing_bar.volume
-                        self.session_vwap_data[symbol] = {'cum_pv': cum_pv, 'cum_vol': cum_vol}
-                        logger.info(
-                            f"[BACKFILL] {symbol}: VWAP restored "
-                            f"(cum_pv={cum_pv:.2f}, cum_vol={cum_vol})"
-                        )
-                    else:
-                        vwap_data = self.session_vwap_data[symbol]
-                        cum_pv = vwap_data['cum_pv']
-                        cum_vol = vwap_data['cum_vol']
-
-                    for idx, row in missed_bars.iterrows():
-                        bar = BarData(timestamp=idx)
-                        bar.open = row.get('open', row.get('Open'))
-                        bar.high = row.get('high', row.get('High'))
-                        bar.low = row.get('low', row.get('Low'))
-                        bar.close = row.get('close', row.get('Close'))
-                        bar.volume = row.get('volume', row.get('Volume', 0))
-
-                        # Calculate cumulative session VWAP
-                        typical_price = (bar.high + bar.low + bar.close) / 3
-                        cum_pv += typical_price * bar.volume
-                        cum_vol += bar.volume
-
-                        if cum_vol > 0:
-                            bar.vwap = cum_pv / cum_vol
-                        else:
-                            bar.vwap = typical_price
-
-                        bar.tick_count = 1
-
-                        self.bars[symbol].append(bar)
-                        # Store when bar was RECEIVED (for watchdog)
-                        self.last_bar_timestamp[symbol] = datetime.now(IST)
-                        backfilled_count += 1
-
-                    # Update session VWAP cumulative values
-                    self.session_vwap_data[symbol] = {
-                        'cum_pv': cum_pv,
-                        'cum_vol': cum_vol
-                    }
+                with self._lock_for(symbol):
+                    # Continue the session VWAP from the symbol's running totals
+                    o, h, l, c, v = _ohlcv_columns(missed_bars)
+                    vwap, cum_pv, cum_vol = _cumulative_vwap(h, l, c, v, st.cum_pv, st.cum_vol)
+                    backfilled_count += self._extend_bars(
+                        st, list(missed_bars.index), o, h, l, c, v, vwap, cum_pv, cum_vol, tick_count=1
+                    )
+                    # Store when bar was RECEIVED (for watchdog)
+                    st.last_bar_received = self._last_bar_received_at = datetime.now(IST)
 
                 logger.debug(f"Backfilled {len(missed_bars)} bars for {symbol}")
                 
@@ -1271,30 +1638,14 @@ class DataPipeline:
     
     def prune_bars(self):
         """
-        🔴 NEW: Prune old bars to manage memory
-        
-        Keeps only last MAX_BARS_PER_SYMBOL bars per symbol.
-        Called periodically to prevent unbounded memory growth.
+        Deprecated no-op: bar history is a bounded deque (MAX_BARS_PER_SYMBOL),
+        oldest bars are evicted on append.
         """
-        with self.lock:
-            pruned_count = 0
-            
-            for symbol in list(self.bars.keys()):
-                bar_count = len(self.bars[symbol])
-                
-                if bar_count > BAR_PRUNING_THRESHOLD:
-                    # Keep only last MAX_BARS_PER_SYMBOL bars
-                    removed = bar_count - MAX_BARS_PER_SYMBOL
-                    self.bars[symbol] = self.bars[symbol][-MAX_BARS_PER_SYMBOL:]
-                    pruned_count += removed
-                    
-                    logger.debug(
-                        f"Pruned {removed} old bars from {symbol} "
-                        f"(kept {MAX_BARS_PER_SYMBOL})"
-                    )
-            
-            if pruned_count > 0:
-                logger.info(f"[CLEANUP] Memory pruning: removed {pruned_count} old bars")
+        warnings.warn(
+            "DataPipeline.prune_bars() is a no-op; bar history is bounded automatically",
+            DeprecationWarning,
+            stacklevel=2,
+        )
     
     def disconnect(self):
         """Disconnect WebSocket and clean up"""
@@ -1302,6 +1653,9 @@ class DataPipeline:
         if self.monitor_running:
             self.stop_connection_monitor()
 
+        if self.aggregator_running:
+            self.stop_aggregator()
+
         if self.client and self.is_connected:
             try:
                 self.last_disconnect_time = datetime.now(IST)
@@ -8,15 +8,14 @@ if str(BASE_DIR) not in sys.path:
 
 import streamlit as st
 import pandas as pd
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
-import plotly.express as px
 import time as time_module
 
-from db import read_df
-from ui_components import kpi, df_table, candlestick_chart, build_symbol
+from db import read_df_cached as read_df, read_df_slow, read_df_async, read_many_cached as read_many
+from ui_components import kpi, df_table, candlestick_chart, build_symbol, parse_symbol
 import queries as q
-from config import STRATEGY_NAME, FAST_REFRESH, STATE_DB_PATH
+from config import STRATEGY_NAME, FAST_REFRESH, CHART_REFRESH, STATE_DB_PATH
 
 
 IST = pytz.timezone("Asia/Kolkata")
@@ -69,8 +68,6 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Auto refresh
-
 # ─────────────────────────────────────────────
 # DATABASE CHECK - Wait for trading_agent to create database
 # ─────────────────────────────────────────────
@@ -83,90 +80,156 @@ if not db_ready:
     time_module.sleep(5)
     st.rerun()
 
-# ─────────────────────────────────────────────
-# HEADER
-# ─────────────────────────────────────────────
-now = datetime.now(IST).strftime("%H:%M:%S IST")
-
-st.markdown(
-    f"""
-    # 🧠 {STRATEGY_NAME} – Live Dashboard
-    **Time:** {now}
-    ---
-    """
-)
-
-# ─────────────────────────────────────────────
-# KPI ROW
-# ─────────────────────────────────────────────
-try:
-    daily = read_df(q.DAILY_STATE)
-except Exception as e:
-    st.error(f"Database query error: {e}")
-    st.info(f"**DB Status:** {db_status}")
-    st.code(f"DB_PATH={STATE_DB_PATH}")
-    st.caption("Retrying in 5 seconds...")
-    time_module.sleep(5)
-    st.rerun()
-
-# Handle both SQLite (mixed case) and PostgreSQL (lowercase) column names
 def get_col(df, col_name):
-    """Get column value, trying lowercase if original not found"""
+    """Get first-row column value, 0 if the column is missing"""
     if col_name in df.columns:
         return df[col_name].iloc[0]
-    elif col_name.lower() in df.columns:
-        return df[col_name.lower()].iloc[0]
     return 0
 
-cumulative_r = get_col(daily, "cumulative_R") if not daily.empty else 0
-total_pnl = get_col(daily, "total_pnl") if not daily.empty else 0
-positions = read_df(q.POSITIONS)
 
-# Handle column name case sensitivity
-opt_type_col = "option_type" if "option_type" in positions.columns else "option_type"
-ce_count = len(positions[positions[opt_type_col] == "CE"]) if not positions.empty else 0
-pe_count = len(positions[positions[opt_type_col] == "PE"]) if not positions.empty else 0
+def ce_pe_counts(df, col='option_type'):
+    """Count CE and PE rows with a single value_counts pass"""
+    if df.empty:
+        return 0, 0
+    vc = df[col].str.upper().value_counts()
+    return vc.get('CE', 0), vc.get('PE', 0)
 
-col1, col2, col3, col4, col5 = st.columns(5)
 
-with col1:
-    kpi("Cumulative R", f"{cumulative_r:.2f}", "#2ecc71" if cumulative_r >= 0 else "#e74c3c")
-with col2:
-    kpi("Total P&L ₹", f"{total_pnl:,.0f}")
-with col3:
-    kpi("Open Positions", len(positions))
-with col4:
-    kpi("CE / PE", f"{ce_count} / {pe_count}")
-with col5:
-    kpi("Status", "RUNNING", "#3498db")
+def stage_ce_pe(counts, stage):
+    """CE and PE counts for one stage from the STAGE_COUNTS pivot"""
+    if stage not in counts.index:
+        return 0, 0
+    row = counts.loc[stage]
+    return int(row.get('CE', 0)), int(row.get('PE', 0))
 
-st.markdown("---")
+
+def ist_wall_clock(series):
+    """Timestamps as naive IST wall-clock to the second (tz-aware and naive compare equal)"""
+    if series.dt.tz is not None:
+        series = series.dt.tz_convert(IST).dt.tz_localize(None)
+    return series.dt.floor('s')
+
+
+def ist_day_bounds():
+    """Half-open [today, tomorrow) bounds in IST for the "today" timestamp predicates"""
+    today = datetime.now(IST).date()
+    return today.isoformat(), (today + timedelta(days=1)).isoformat()
+
+
+def read_incremental(query, since_query, symbol, ts_col, params=()):
+    """Read rows for symbol, fetching only what is new since the last rerun.
+
+    The full result is kept in st.session_state per (query, symbol, day). Later
+    calls fetch rows with ts_col >= the last cached value and splice them in.
+    The last cached row is fetched again because the agent upserts bars in place;
+    if it no longer comes back (rows deleted, or the query moved on to a new
+    trading day) the cache is stale and the full query is re-run.
+    Within CHART_REFRESH seconds of the last fetch for the same symbol the cached
+    rows are returned without touching the database at all.
+    Extra params (e.g. ist_day_bounds()) follow symbol in both queries; the
+    since_query takes the last cached ts_col value as its final param.
+    Returns a copy, so callers can mutate it freely.
+    """
+    cache = st.session_state.setdefault('incremental_cache', {})
+    key = (query, symbol, datetime.now(IST).date())
+    cached, fetched_at = cache.get(key, (None, 0.0))
+    now = time_module.monotonic()
+
+    if cached is not None and now - fetched_at < CHART_REFRESH:
+        return cached.copy()
+
+    if cached is None or cached.empty:
+        df = read_df(query, params=(symbol, *params))
+    else:
+        last_ts = cached[ts_col].iloc[-1]
+        new_rows = read_df(since_query, params=(symbol, *params, last_ts))
+        if not new_rows.empty and new_rows[ts_col].iloc[0] == last_ts:
+            df = pd.concat([cached[cached[ts_col] < last_ts], new_rows], ignore_index=True)
+        else:
+            df = read_df(query, params=(symbol, *params))
+
+    cache[key] = (df, now)
+    return df.copy()
+
+
+def get_default_expiry():
+    """Current expiry from daily_state (set by baseline strategy)"""
+    expiry_result = read_df_slow(q.NEAREST_EXPIRY)
+    if not expiry_result.empty and expiry_result['expiry'].fillna('').iloc[0]:
+        return expiry_result['expiry'].iloc[0]
+
+    # Fallback: Extract from the latest bar's symbol if daily_state doesn't have it yet
+    latest = read_df_slow(q.LATEST_BAR_SYMBOL)
+    parsed = parse_symbol(latest['symbol'].iloc[0]) if not latest.empty else None
+    return parsed['expiry'] if parsed else "30JAN26"
+
+
+# Each section below is an st.fragment with run_every=FAST_REFRESH, so it
+# refreshes on its own timer and widget interactions only rerun the
+# fragment they belong to instead of the whole script.
 
 # ─────────────────────────────────────────────
-# TABS
+# HEADER + KPI ROW
 # ─────────────────────────────────────────────
-tabs = st.tabs([
-    "📌 Live Positions",
-    "📦 Orders",
-    "🔬 Filter Pipeline (3 Stages)",
-    "🚨 Events",
-    "📊 Performance",
-    "📈 Chart",
-    "🔍 Bar Viewer",
-    "🛑 Controls"
-])
+@st.fragment(run_every=FAST_REFRESH)
+def render_header():
+    now = datetime.now(IST).strftime("%H:%M:%S IST")
+
+    st.markdown(
+        f"""
+        # 🧠 {STRATEGY_NAME} – Live Dashboard
+        **Time:** {now}
+        ---
+        """
+    )
+
+    try:
+        dfs = read_many({
+            'daily': (q.DAILY_STATE, None),
+            'positions': (q.POSITIONS, None),
+        })
+    except Exception as e:
+        st.error(f"Database query error: {e}")
+        st.info(f"**DB Status:** {db_status}")
+        st.code(f"DB_PATH={STATE_DB_PATH}")
+        st.caption(f"Retrying in {FAST_REFRESH} seconds...")
+        return
+
+    daily, positions = dfs['daily'], dfs['positions']
+
+    # SQLite keeps mixed-case column names, PostgreSQL folds them to lowercase
+    daily.columns = daily.columns.str.lower()
+    cumulative_r = get_col(daily, "cumulative_r") if not daily.empty else 0
+    total_pnl = get_col(daily, "total_pnl") if not daily.empty else 0
+
+    ce_count, pe_count = ce_pe_counts(positions)
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+
+    with col1:
+        kpi("Cumulative R", f"{cumulative_r:.2f}", "#2ecc71" if cumulative_r >= 0 else "#e74c3c")
+    with col2:
+        kpi("Total P&L ₹", f"{total_pnl:,.0f}")
+    with col3:
+        kpi("Open Positions", len(positions))
+    with col4:
+        kpi("CE / PE", f"{ce_count} / {pe_count}")
+    with col5:
+        kpi("Status", "RUNNING", "#3498db")
 
 # ─────────────────────────────────────────────
 # TAB 1: LIVE POSITIONS
 # ─────────────────────────────────────────────
-with tabs[0]:
+@st.fragment(run_every=FAST_REFRESH)
+def render_positions():
     st.subheader("Open Positions")
-    df_table(positions)
+    df_table(read_df(q.POSITIONS))
 
 # ─────────────────────────────────────────────
 # TAB 2: ORDERS
 # ─────────────────────────────────────────────
-with tabs[1]:
+@st.fragment(run_every=FAST_REFRESH)
+def render_orders():
     st.subheader("Pending Orders")
     orders = read_df(q.PENDING_ORDERS)
     df_table(orders)
@@ -174,7 +237,30 @@ with tabs[1]:
 # ─────────────────────────────────────────────
 # TAB 3: SWINGS & FILTERS (Three-Stage Filter Pipeline)
 # ─────────────────────────────────────────────
-with tabs[2]:
+@st.fragment(run_every=FAST_REFRESH)
+def render_filter_pipeline():
+    # Candidate/rejection tables are only fetched when asked for; the counts
+    # below come from a single grouped query
+    show_details = st.toggle("Show candidate and rejection tables", key="filter_details")
+
+    day = ist_day_bounds()
+    specs = {
+        'counts': (q.STAGE_COUNTS, day),
+        'stage3': (q.STAGE3_FINAL_QUALIFIERS, day),
+    }
+    if show_details:
+        specs.update({
+            'stage1': (q.STAGE1_STATIC_CANDIDATES, None),
+            'stage2': (q.STAGE2_DYNAMIC_CANDIDATES, None),
+            'rej': (q.FILTER_REJECTIONS, None),
+        })
+    dfs = read_many(specs)
+
+    counts = dfs['counts']
+    counts['option_type'] = counts['option_type'].str.upper()
+    counts = counts.pivot_table(index='stage', columns='option_type', values='n',
+                                aggfunc='sum', fill_value=0)
+
     st.markdown("""
     ### Strike Filtration Pipeline
 
@@ -190,13 +276,13 @@ with tabs[2]:
 
     # Filter Summary Metrics
     st.subheader("📊 Filter Effectiveness Summary")
-    summary = read_df(q.FILTER_SUMMARY_METRICS)
+    summary = read_df_slow(q.FILTER_SUMMARY_METRICS, params=day)
 
     if not summary.empty:
         total = summary['total_swings_detected'].iloc[0]
-        static = summary['static_filter_pass'].iloc[0]
-        sl_pass = summary['sl_filter_pass'].iloc[0]
-        best = summary['best_strikes_selected'].iloc[0]
+        static = sum(stage_ce_pe(counts, 'stage1'))
+        sl_pass = sum(stage_ce_pe(counts, 'stage2'))
+        best = sum(stage_ce_pe(counts, 'stage3'))
 
         # Calculate percentages
         static_pct = (static / total * 100) if total > 0 else 0
@@ -225,35 +311,31 @@ with tabs[2]:
     # Stage-1: Static Filters Candidates
     st.subheader("📋 Stage-1: Static Filters Candidates")
     st.caption("Swings that passed price range (100-300 Rs) and VWAP premium (≥4%) at swing formation")
-    stage1 = read_df(q.STAGE1_STATIC_CANDIDATES)
-    if not stage1.empty:
-        # Show count by option type
-        ce_count = len(stage1[stage1['option_type'] == 'CE'])
-        pe_count = len(stage1[stage1['option_type'] == 'PE'])
-        st.info(f"**{len(stage1)} Total Candidates** | CE: {ce_count} | PE: {pe_count}")
-    df_table(stage1, height=250)
+    ce_count, pe_count = stage_ce_pe(counts, 'stage1')
+    if ce_count + pe_count:
+        st.info(f"**{ce_count + pe_count} Total Candidates** | CE: {ce_count} | PE: {pe_count}")
+    if show_details:
+        df_table(dfs['stage1'], height=250)
 
     st.markdown("---")
 
     # Stage-2: Dynamic Filters Candidates
     st.subheader("⚡ Stage-2: Dynamic Filters Candidates")
     st.caption("Stage-1 candidates that CURRENTLY pass SL% filter (2-10%). SL% recalculated every bar.")
-    stage2 = read_df(q.STAGE2_DYNAMIC_CANDIDATES)
-    if not stage2.empty:
-        # Show count by option type
-        ce_count = len(stage2[stage2['option_type'] == 'CE'])
-        pe_count = len(stage2[stage2['option_type'] == 'PE'])
-        st.success(f"**{len(stage2)} Qualified Candidates** | CE: {ce_count} | PE: {pe_count}")
+    ce_count, pe_count = stage_ce_pe(counts, 'stage2')
+    if ce_count + pe_count:
+        st.success(f"**{ce_count + pe_count} Qualified Candidates** | CE: {ce_count} | PE: {pe_count}")
     else:
         st.warning("⚠️ No candidates currently pass dynamic SL% filter (2-10%)")
-    df_table(stage2, height=250)
+    if show_details:
+        df_table(dfs['stage2'], height=250)
 
     st.markdown("---")
 
     # Stage-3: Final Qualifiers
     st.subheader("🎯 Stage-3: Final Qualifiers (Best Strikes)")
     st.caption("Best CE and best PE selected from Stage-2 using tie-breaker (SL points closest to 10, then highest entry price)")
-    stage3 = read_df(q.STAGE3_FINAL_QUALIFIERS)
+    stage3 = dfs['stage3']
     if not stage3.empty:
         # Highlight the final strikes
         st.success(f"**{len(stage3)} Final Strikes Ready** (max 2: 1 CE + 1 PE)")
@@ -261,18 +343,18 @@ with tabs[2]:
         st.warning("⚠️ No final qualifiers - waiting for candidates to pass all filters")
     df_table(stage3, height=150)
 
-    st.markdown("---")
-
     # Recent Rejections
-    st.subheader("❌ Recent Rejections")
-    st.caption("Swings rejected by static or dynamic filters (last 50)")
-    rej = read_df(q.FILTER_REJECTIONS)
-    df_table(rej, height=300)
+    if show_details:
+        st.markdown("---")
+        st.subheader("❌ Recent Rejections")
+        st.caption("Swings rejected by static or dynamic filters (last 50)")
+        df_table(dfs['rej'], height=300)
 
 # ─────────────────────────────────────────────
 # TAB 4: EVENTS
 # ─────────────────────────────────────────────
-with tabs[3]:
+@st.fragment(run_every=FAST_REFRESH)
+def render_events():
     st.subheader("Recent Trade Events")
     trades = read_df(q.TRADE_LOG)
     df_table(trades)
@@ -280,8 +362,13 @@ with tabs[3]:
 # ─────────────────────────────────────────────
 # TAB 5: PERFORMANCE
 # ─────────────────────────────────────────────
-with tabs[4]:
+@st.fragment(run_every=FAST_REFRESH)
+def render_performance():
+    trades = read_df(q.TRADE_LOG)
     if not trades.empty:
+        # Imported lazily: plotly is only needed once there are trades to plot
+        import plotly.express as px
+
         st.subheader("R Distribution")
         fig = px.histogram(trades, x="realized_R", nbins=20)
         st.plotly_chart(fig, use_container_width=True)
@@ -289,24 +376,11 @@ with tabs[4]:
 # ─────────────────────────────────────────────
 # TAB 6: CHART
 # ─────────────────────────────────────────────
-with tabs[5]:
+@st.fragment(run_every=FAST_REFRESH)
+def render_chart():
     st.subheader("Option Price Chart")
 
-    # Get current expiry from daily_state (set by baseline strategy)
-    expiry_result = read_df(q.NEAREST_EXPIRY)
-    if not expiry_result.empty and expiry_result['expiry'].iloc[0]:
-        default_expiry = expiry_result['expiry'].iloc[0]
-    else:
-        # Fallback: Extract from available symbols if daily_state doesn't have it yet
-        fallback_query = """
-        SELECT DISTINCT substr(symbol, 6, 7) as expiry
-        FROM bars
-        WHERE symbol LIKE 'NIFTY%'
-        ORDER BY expiry DESC
-        LIMIT 1
-        """
-        fallback_result = read_df(fallback_query)
-        default_expiry = fallback_result['expiry'].iloc[0] if not fallback_result.empty else "30JAN26"
+    default_expiry = get_default_expiry()
 
     # Create input controls
     col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
@@ -330,17 +404,21 @@ with tabs[5]:
 
         symbol = build_symbol(expiry, strike, option_type)
 
-        # Fetch OHLC data
-        ohlc_df = read_df(q.OHLC_DATA, params=(symbol,))
+        # Position lookup runs on a reader thread while the OHLC and swing
+        # reads below go through the session's incremental cache
+        position_future = read_df_async(q.POSITION_FOR_SYMBOL, params=(symbol,))
+
+        # Fetch OHLC data for the most recent date only, VWAP computed in SQL
+        # (avoids multi-day VWAP calculation issues)
+        ohlc_df = read_incremental(q.OHLC_DATA_TODAY_WITH_VWAP, q.OHLC_DATA_TODAY_WITH_VWAP_SINCE,
+                                   symbol, 'timestamp')
 
-        # Filter to most recent date only (avoid multi-day VWAP calculation issues)
         most_recent_date = None
+        current_vwap = None
         if not ohlc_df.empty:
             ohlc_df['timestamp'] = pd.to_datetime(ohlc_df['timestamp'])
-            ohlc_df['date'] = ohlc_df['timestamp'].dt.date
-            most_recent_date = ohlc_df['date'].max()
-            ohlc_df = ohlc_df[ohlc_df['date'] == most_recent_date].copy()
-            ohlc_df = ohlc_df.drop(columns=['date'])
+            most_recent_date = ohlc_df['timestamp'].iloc[-1].date()
+            current_vwap = ohlc_df['vwap'].iloc[-1]
 
         # Show info with data coverage warning
         coverage_pct = (len(ohlc_df) / 375) * 100  # 375 = full trading session bars
@@ -350,7 +428,7 @@ with tabs[5]:
             st.info(f"📊 **{symbol}** | Trading Date: **{most_recent_date}** | Bars: **{len(ohlc_df)}** ({coverage_pct:.1f}% coverage)")
 
         # Fetch swing data
-        swings_df = read_df(q.SWING_DATA, params=(symbol,))
+        swings_df = read_incremental(q.SWING_DATA, q.SWING_DATA_SINCE, symbol, 'swing_time')
 
         # Filter swings to same date
         if not swings_df.empty and not ohlc_df.empty:
@@ -359,18 +437,8 @@ with tabs[5]:
             swings_df = swings_df[swings_df['date'] == most_recent_date].copy()
             swings_df = swings_df.drop(columns=['date'])
 
-        # Fetch position data (if any)
-        position_df = read_df(q.POSITION_FOR_SYMBOL, params=(symbol,))
-
-        # Calculate VWAP for metrics display
-        current_vwap = None
-        if not ohlc_df.empty:
-            ohlc_df['typical_price'] = (ohlc_df['high'] + ohlc_df['low'] + ohlc_df['close']) / 3
-            ohlc_df['tp_volume'] = ohlc_df['typical_price'] * ohlc_df['volume']
-            ohlc_df['cumulative_tp_volume'] = ohlc_df['tp_volume'].cumsum()
-            ohlc_df['cumulative_volume'] = ohlc_df['volume'].cumsum()
-            ohlc_df['vwap'] = ohlc_df['cumulative_tp_volume'] / ohlc_df['cumulative_volume']
-            current_vwap = ohlc_df['vwap'].iloc[-1]
+        # Position data (if any)
+        position_df = position_future.result()
 
         # Display chart info
         col_info1, col_info2, col_info3, col_info4 = st.columns(4)
@@ -409,24 +477,11 @@ with tabs[5]:
 # ─────────────────────────────────────────────
 # TAB 7: BAR VIEWER (Full Session from 9:15 AM)
 # ─────────────────────────────────────────────
-with tabs[6]:
+@st.fragment(run_every=FAST_REFRESH)
+def render_bar_viewer():
     st.subheader("🔍 Bar Viewer - Full Session (9:15 AM onwards) with Swing Labels")
 
-    # Get current expiry from daily_state (set by baseline strategy)
-    expiry_result = read_df(q.NEAREST_EXPIRY)
-    if not expiry_result.empty and expiry_result['expiry'].iloc[0]:
-        default_expiry = expiry_result['expiry'].iloc[0]
-    else:
-        # Fallback: Extract from available symbols if daily_state doesn't have it yet
-        fallback_query = """
-        SELECT DISTINCT substr(symbol, 6, 7) as expiry
-        FROM bars
-        WHERE symbol LIKE 'NIFTY%'
-        ORDER BY expiry DESC
-        LIMIT 1
-        """
-        fallback_result = read_df(fallback_query)
-        default_expiry = fallback_result['expiry'].iloc[0] if not fallback_result.empty else "30JAN26"
+    default_expiry = get_default_expiry()
 
     # Create input controls
     col1, col2, col3, col4 = st.columns([2, 2, 2, 1])
@@ -451,7 +506,8 @@ with tabs[6]:
         symbol = build_symbol(expiry_viewer, strike_viewer, option_type_viewer)
 
         # Fetch all bars from 9:15 AM onwards (today's session)
-        bars_df = read_df(q.LAST_20_BARS, params=(symbol,))
+        bars_df = read_incremental(q.LAST_20_BARS, q.LAST_20_BARS_SINCE, symbol, 'timestamp',
+                                   params=ist_day_bounds())
 
         if bars_df.empty:
             st.warning(f"⚠️ No bar data found for {symbol}")
@@ -497,20 +553,17 @@ with tabs[6]:
             if not swings_df.empty:
                 swings_df['swing_time'] = pd.to_datetime(swings_df['swing_time'])
 
-                # Convert both to string format for comparison (handles timezone mismatches)
-                display_df['ts_str'] = display_df['timestamp'].dt.strftime('%Y-%m-%d %H:%M:%S')
-                swings_df['ts_str'] = swings_df['swing_time'].dt.strftime('%Y-%m-%d %H:%M:%S')
+                # Join labels on wall-clock time (handles timezone mismatches);
+                # the latest swing wins when several share a bar
+                labels = pd.DataFrame({
+                    'bar_time': ist_wall_clock(swings_df['swing_time']),
+                    'label': swings_df['swing_type'] + ' @ ' + swings_df['swing_price'].map('{:.2f}'.format),
+                }).drop_duplicates('bar_time', keep='last')
 
-                for _, swing in swings_df.iterrows():
-                    # Find matching bar by timestamp string
-                    mask = display_df['ts_str'] == swing['ts_str']
-                    if mask.any():
-                        swing_type = swing['swing_type']
-                        swing_price = swing['swing_price']
-                        display_df.loc[mask, 'swing_label'] = f"{swing_type} @ {swing_price:.2f}"
-
-                # Drop temp column
-                display_df = display_df.drop(columns=['ts_str'])
+                display_df['bar_time'] = ist_wall_clock(display_df['timestamp'])
+                display_df = display_df.merge(labels, on='bar_time', how='left')
+                display_df['swing_label'] = display_df['label'].fillna('')
+                display_df = display_df.drop(columns=['bar_time', 'label'])
 
             # Display bar data table with swing labels
             st.subheader("📋 Bar Data with Swing Labels")
@@ -530,7 +583,8 @@ with tabs[6]:
 # ─────────────────────────────────────────────
 # TAB 8: CONTROLS (SAFE)
 # ─────────────────────────────────────────────
-with tabs[7]:
+@st.fragment
+def render_controls():
     st.warning("Controls are SAFE MODE (no orders)")
 
     if st.button("⏸ Pause New Entries"):
@@ -540,9 +594,39 @@ with tabs[7]:
         st.error("Kill switch triggered (implement DB flag read in strategy)")
 
 # ─────────────────────────────────────────────
-# AUTO REFRESH
+# LAYOUT
 # ─────────────────────────────────────────────
+render_header()
+
+st.markdown("---")
+
+tabs = st.tabs([
+    "📌 Live Positions",
+    "📦 Orders",
+    "🔬 Filter Pipeline (3 Stages)",
+    "🚨 Events",
+    "📊 Performance",
+    "📈 Chart",
+    "🔍 Bar Viewer",
+    "🛑 Controls"
+])
+
+with tabs[0]:
+    render_positions()
+with tabs[1]:
+    render_orders()
+with tabs[2]:
+    render_filter_pipeline()
+with tabs[3]:
+    render_events()
+with tabs[4]:
+    render_performance()
+with tabs[5]:
+    render_chart()
+with tabs[6]:
+    render_bar_viewer()
+with tabs[7]:
+    render_controls()
+
 st.caption(f"Auto-refresh every {FAST_REFRESH}s")
-time_module.sleep(FAST_REFRESH)
-st.rerun()
 
@@ -7,5 +7,6 @@ STATE_DB_PATH = os.environ.get('DB_PATH', str(Path(__file__).resolve().parent.pa
 
 FAST_REFRESH = 5
 SLOW_REFRESH = 30
+CHART_REFRESH = 15  # Chart / Bar Viewer re-query interval for an unchanged symbol
 
 STRATEGY_NAME = "Baseline V1 Live"
@@ -1,6 +1,8 @@
 import os
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
+import streamlit as st
 
 # SQLAlchemy support for PostgreSQL
 try:
@@ -9,7 +11,16 @@ try:
 except ImportError:
     HAS_SQLALCHEMY = False
 
-from config import STATE_DB_PATH
+# Optional: connectorx streams PostgreSQL results straight into Arrow columns.
+# It opens its own connection per call (no pooling), so read_df only uses it
+# when a caller asks for bulk=True on a large result set
+try:
+    import connectorx as cx
+    HAS_CONNECTORX = True
+except ImportError:
+    HAS_CONNECTORX = False
+
+from config import STATE_DB_PATH, FAST_REFRESH, SLOW_REFRESH
 
 # Database URL from environment (for PostgreSQL on Railway)
 DATABASE_URL = os.environ.get('DATABASE_URL', '')
@@ -17,15 +28,79 @@ DATABASE_URL = os.environ.get('DATABASE_URL', '')
 # Determine database type
 DB_TYPE = 'postgresql' if DATABASE_URL.startswith('postgresql://') else 'sqlite'
 
-# Create SQLAlchemy engine for PostgreSQL (reusable connection pool)
-_pg_engine = None
-if DB_TYPE == 'postgresql' and HAS_SQLALCHEMY:
-    _pg_engine = create_engine(DATABASE_URL)
 
+# Per-connection read tuning for SQLite. Only settings that are valid on a
+# read-only connection: the writer (state_manager) already owns journal_mode=WAL.
+SQLITE_READ_PRAGMAS = (
+    "PRAGMA mmap_size=268435456",   # serve pages from a 256 MB memory map, no read() per page
+    "PRAGMA cache_size=-65536",     # 64 MB page cache
+    "PRAGMA temp_store=MEMORY",     # sorts/GROUP BY temp tables stay in RAM
+)
+
+
+@st.cache_resource(show_spinner=False)
+def _pg_engine():
+    """SQLAlchemy engine for PostgreSQL, shared across reruns and sessions.
+
+    Four persistent connections plus four overflow covers read_many's eight
+    workers; connections are recycled before Railway's proxy idles them out.
+    """
+    return create_engine(
+        DATABASE_URL,
+        pool_size=4,
+        max_overflow=4,
+        pool_pre_ping=True,
+        pool_recycle=300,
+    )
+
+
+def _sqlite_connect():
+    """Open a tuned read-only SQLite connection.
+
+    Plain mode=ro reads through the writer's WAL, so uncheckpointed commits are
+    visible. It needs the -shm index to be usable; on a read-only volume where it
+    is not, fall back to the immutable URI, which works even when the filesystem
+    is mounted read-only but only sees checkpointed pages.
+    """
+    last_error = None
+    for uri_params in ("mode=ro", "mode=ro&immutable=1"):
+        conn = sqlite3.connect(f"file:{STATE_DB_PATH}?{uri_params}", uri=True, check_same_thread=False)
+        try:
+            for pragma in SQLITE_READ_PRAGMAS:
+                conn.execute(pragma)
+            conn.execute("SELECT 1 FROM sqlite_master LIMIT 1")
+            return conn
+        except sqlite3.OperationalError as e:
+            conn.close()
+            last_error = e
+    raise last_error
+
+
+def _arrow_strings(df):
+    """Store text columns as pyarrow strings instead of Python str objects.
+
+    Only columns that hold nothing but strings (or nulls) are converted, so
+    Decimal/bytes/datetime object columns are left alone.
+    """
+    for col in df.columns[df.dtypes == object]:
+        if pd.api.types.infer_dtype(df[col]) == 'string':
+            df[col] = df[col].astype('string[pyarrow]')
+    return df
+
+
+def read_df(query, params=None, bulk=False):
+    """Read data from database into pandas DataFrame
 
-def read_df(query, params=None):
-    """Read data from database into pandas DataFrame"""
+    bulk=True loads an unparameterized PostgreSQL query through connectorx.
+    That skips the pooled engine and pays a fresh connection handshake, so it
+    only wins for large result sets; the dashboard's polled queries (single
+    rows, LIMIT 50 logs, open positions) stay on the pool.
+    """
     if DB_TYPE == 'postgresql':
+        # connectorx has no bind params, and values are never spliced into SQL text
+        if bulk and HAS_CONNECTORX and not params:
+            return _arrow_strings(cx.read_sql(DATABASE_URL, query, return_type='pandas'))
+
         if not HAS_SQLALCHEMY:
             raise ImportError("SQLAlchemy is required for PostgreSQL. Install with: pip install sqlalchemy")
 
@@ -34,7 +109,7 @@ def read_df(query, params=None):
             query = query.replace('?', '%s')
 
         # Use SQLAlchemy text() wrapper and connection context
-        with _pg_engine.connect() as conn:
+        with _pg_engine().connect() as conn:
             if params:
                 # Convert params tuple to dict for SQLAlchemy text()
                 # Replace %s with :p0, :p1, etc. for named parameters
@@ -48,13 +123,62 @@ def read_df(query, params=None):
 
             # Convert to DataFrame
             df = pd.DataFrame(result.fetchall(), columns=result.keys())
-            return df
+            return _arrow_strings(df)
     else:
-        # Use URI mode with immutable flag for read-only access
-        # This works even when the filesystem is mounted read-only
-        db_uri = f"file:{STATE_DB_PATH}?mode=ro&immutable=1"
-        conn = sqlite3.connect(db_uri, uri=True, check_same_thread=False)
+        # One connection per query: in immutable mode SQLite caches pages
+        # forever, so a long-lived connection would never see new writes.
+        conn = _sqlite_connect()
         try:
-            return pd.read_sql(query, conn, params=params)
+            return _arrow_strings(pd.read_sql(query, conn, params=params))
         finally:
             conn.close()
+
+
+@st.cache_data(ttl=FAST_REFRESH, show_spinner=False, max_entries=128)
+def read_df_cached(query, params=None):
+    """Cached read_df for the dashboard.
+
+    Results are reused for FAST_REFRESH seconds so repeated reruns within the
+    refresh window skip the database entirely. Use read_df directly outside
+    of Streamlit.
+    """
+    return read_df(query, params)
+
+
+@st.cache_data(ttl=SLOW_REFRESH, show_spinner=False, max_entries=32)
+def read_df_slow(query, params=None):
+    """read_df cached for SLOW_REFRESH seconds, for lookups that rarely change
+    (filter summary, current expiry). Shared by every session and tab."""
+    return read_df(query, params)
+
+
+# Shared reader threads; each read_df opens its own connection, so queries
+# submitted here run in parallel
+_READ_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="db-read")
+
+
+def read_df_async(query, params=None):
+    """Start read_df on a reader thread; returns a Future of the DataFrame.
+
+    Lets a render function overlap a query with its other reads.
+    """
+    return _READ_POOL.submit(read_df, query, params)
+
+
+def read_many(specs):
+    """Run several read_df queries concurrently.
+
+    specs maps a name to (query, params); returns {name: DataFrame}. Wall time
+    is the slowest query instead of the sum of all of them.
+    """
+    futures = {
+        name: read_df_async(query, params)
+        for name, (query, params) in specs.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
+
+
+@st.cache_data(ttl=FAST_REFRESH, show_spinner=False, max_entries=32)
+def read_many_cached(specs):
+    """Cached read_many for the dashboard (see read_df_cached)"""
+    return read_many(specs)
@@ -36,13 +36,7 @@ SELECT
         ELSE NULL
     END as sl_pct
 FROM swing_candidates sc
-LEFT JOIN (
-    SELECT
-        symbol,
-        MAX(high) as highest_high
-    FROM bars
-    GROUP BY symbol
-) b ON sc.symbol = b.symbol
+LEFT JOIN bars_high_rollup b ON sc.symbol = b.symbol
 WHERE sc.active = 1
 ORDER BY sc.option_type, sc.timestamp DESC
 """
@@ -56,39 +50,45 @@ SELECT
     sc.timestamp,
     sc.option_type,
     ROUND(((sc.swing_low - sc.vwap_at_swing) / sc.vwap_at_swing) * 100, 2) as vwap_premium_pct,
-    b.highest_high,
-    ROUND(b.highest_high + 1, 2) as sl_price,
-    ROUND(b.highest_high + 1 - sc.swing_low, 2) as sl_points,
-    ROUND(((b.highest_high + 1 - sc.swing_low) / sc.swing_low) * 100, 2) as sl_pct,
+    sc.highest_high,
+    ROUND(sc.highest_high + 1, 2) as sl_price,
+    ROUND(sc.highest_high + 1 - sc.swing_low, 2) as sl_points,
+    ROUND(sc.sl_ratio * 100, 2) as sl_pct,
     'Qualified' as status
-FROM swing_candidates sc
-INNER JOIN (
-    SELECT
-        symbol,
-        MAX(high) as highest_high
-    FROM bars
-    GROUP BY symbol
-) b ON sc.symbol = b.symbol
-WHERE sc.active = 1
-    AND ((b.highest_high + 1 - sc.swing_low) / sc.swing_low) >= 0.02  -- MIN_SL_PERCENT
-    AND ((b.highest_high + 1 - sc.swing_low) / sc.swing_low) <= 0.10  -- MAX_SL_PERCENT
+FROM stage2_candidates sc
+WHERE sc.sl_ratio BETWEEN 0.02 AND 0.10  -- MIN_SL_PERCENT / MAX_SL_PERCENT
 ORDER BY sc.option_type, sc.timestamp DESC
 """
 
+# Queries scoped to "today" take half-open [today_start, tomorrow_start) bounds
+# (see app.ist_day_bounds) instead of DATE(col) = DATE('now', 'localtime'), so
+# the timestamp indexes can be range-scanned.
+
 # Filter Summary Metrics (SQLite compatible)
+# Only the funnel's entry count; the per-stage pass counts come from STAGE_COUNTS
 FILTER_SUMMARY_METRICS = """
-SELECT
-    (SELECT COUNT(*) FROM all_swings_log WHERE swing_type = 'Low' AND DATE(swing_time) = DATE('now', 'localtime')) as total_swings_detected,
-    (SELECT COUNT(*) FROM swing_candidates WHERE active = 1) as static_filter_pass,
-    (SELECT COUNT(*) FROM (
-        SELECT sc.symbol
-        FROM swing_candidates sc
-        INNER JOIN (SELECT symbol, MAX(high) as highest_high FROM bars GROUP BY symbol) b ON sc.symbol = b.symbol
-        WHERE sc.active = 1
-            AND ((b.highest_high + 1 - sc.swing_low) / sc.swing_low) >= 0.02
-            AND ((b.highest_high + 1 - sc.swing_low) / sc.swing_low) <= 0.10
-    ) subq) as sl_filter_pass,
-    (SELECT COUNT(*) FROM best_strikes WHERE is_current = 1 AND DATE(updated_at) = DATE('now', 'localtime')) as best_strikes_selected
+SELECT COUNT(*) as total_swings_detected
+FROM all_swings_log
+WHERE swing_type = 'Low' AND swing_time >= ? AND swing_time < ?
+"""
+
+# CE/PE counts for all three stages in one round-trip (same filters as the
+# STAGE1/STAGE2/STAGE3 detail queries)
+STAGE_COUNTS = """
+SELECT 'stage1' as stage, option_type, COUNT(*) as n
+FROM swing_candidates
+WHERE active = 1
+GROUP BY option_type
+UNION ALL
+SELECT 'stage2' as stage, option_type, COUNT(*) as n
+FROM stage2_candidates
+WHERE sl_ratio BETWEEN 0.02 AND 0.10
+GROUP BY option_type
+UNION ALL
+SELECT 'stage3' as stage, option_type, COUNT(*) as n
+FROM best_strikes
+WHERE is_current = 1 AND updated_at >= ? AND updated_at < ?
+GROUP BY option_type
 """
 
 # Legacy alias for backward compatibility
@@ -109,7 +109,7 @@ SELECT
     'Final' as status
 FROM best_strikes
 WHERE is_current = 1
-AND DATE(updated_at) = DATE('now', 'localtime')
+AND updated_at >= ? AND updated_at < ?
 ORDER BY option_type DESC, updated_at DESC
 """
 
@@ -145,6 +145,34 @@ WHERE symbol = ?
 ORDER BY timestamp ASC
 """
 
+# Most recent trading day only, with session VWAP from a window function
+OHLC_DATA_TODAY_WITH_VWAP = """
+WITH sym AS (
+    SELECT timestamp, open, high, low, close, volume
+    FROM bars
+    WHERE symbol = ?
+),
+day AS (
+    SELECT * FROM sym
+    WHERE DATE(timestamp) = (SELECT MAX(DATE(timestamp)) FROM sym)
+)
+SELECT
+    timestamp, open, high, low, close, volume,
+    SUM((high + low + close) / 3.0 * volume) OVER w
+        / NULLIF(SUM(volume) OVER w, 0) as vwap
+FROM day
+WINDOW w AS (ORDER BY timestamp ROWS UNBOUNDED PRECEDING)
+ORDER BY timestamp ASC
+"""
+
+# Incremental variant: rows at or after the last timestamp already loaded
+# (VWAP is still accumulated over the whole day)
+OHLC_DATA_TODAY_WITH_VWAP_SINCE = f"""
+SELECT * FROM ({OHLC_DATA_TODAY_WITH_VWAP}) t
+WHERE timestamp >= ?
+ORDER BY timestamp ASC
+"""
+
 SWING_DATA = """
 SELECT swing_type, swing_price, swing_time, vwap, bar_index
 FROM all_swings_log
@@ -152,6 +180,14 @@ WHERE symbol = ?
 ORDER BY swing_time ASC
 """
 
+SWING_DATA_SINCE = """
+SELECT swing_type, swing_price, swing_time, vwap, bar_index
+FROM all_swings_log
+WHERE symbol = ?
+AND swing_time >= ?
+ORDER BY swing_time ASC
+"""
+
 POSITION_FOR_SYMBOL = """
 SELECT entry_price, sl_price, entry_time, exit_time, is_closed
 FROM positions
@@ -171,7 +207,16 @@ LAST_20_BARS = """
 SELECT timestamp, open, high, low, close, volume
 FROM bars
 WHERE symbol = ?
-AND DATE(timestamp) = DATE('now', 'localtime')
+AND timestamp >= ? AND timestamp < ?
+ORDER BY timestamp ASC
+"""
+
+LAST_20_BARS_SINCE = """
+SELECT timestamp, open, high, low, close, volume
+FROM bars
+WHERE symbol = ?
+AND timestamp >= ? AND timestamp < ?
+AND timestamp >= ?
 ORDER BY timestamp ASC
 """
 
@@ -182,3 +227,12 @@ FROM daily_state
 WHERE trade_date = DATE('now', 'localtime')
 LIMIT 1
 """
+
+# Fallback expiry source: the most recently written option bar
+LATEST_BAR_SYMBOL = """
+SELECT symbol
+FROM bars
+WHERE symbol LIKE 'NIFTY%'
+ORDER BY timestamp DESC
+LIMIT 1
+"""
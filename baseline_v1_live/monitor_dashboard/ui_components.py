@@ -1,8 +1,17 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
+import numpy as np
 from datetime import datetime
 import re
+from typing import TYPE_CHECKING
+
+from config import FAST_REFRESH
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+# Compiled once at import; parse_symbol runs on every fragment refresh
+SYMBOL_RE = re.compile(r"NIFTY(\d{2}[A-Z]{3}\d{2})(\d+)(CE|PE)")
 
 def kpi(label, value, color="#2c3e50"):
     st.markdown(
@@ -21,11 +30,39 @@ def kpi(label, value, color="#2c3e50"):
         unsafe_allow_html=True
     )
 
+# Low-cardinality label columns sent to the browser as dictionary-encoded categories
+CATEGORY_COLUMNS = ('option_type', 'swing_type', 'stage', 'status', 'rejection_reason')
+
+# Decimals st.dataframe shows for floats; float32 must match float64 at this precision
+DISPLAY_DECIMALS = 4
+
+
+def shrink_for_display(df: pd.DataFrame) -> pd.DataFrame:
+    """Smaller copy of df for st.dataframe serialization.
+
+    float64 columns become float32 only when every value displays the same
+    at DISPLAY_DECIMALS (so prices/P&L like 12345.67 keep float64), label
+    columns become categories.
+    """
+    df = df.copy()
+    for col in df.select_dtypes('float64').columns:
+        values = df[col].to_numpy()
+        with np.errstate(invalid='ignore', over='ignore'):
+            narrowed = values.astype(np.float32)
+            if np.array_equal(np.round(narrowed.astype(np.float64), DISPLAY_DECIMALS),
+                              np.round(values, DISPLAY_DECIMALS), equal_nan=True):
+                df[col] = narrowed
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    return df
+
+
 def df_table(df: pd.DataFrame, height=400):
     if df is None or df.empty:
         st.info("No data available")
     else:
-        st.dataframe(df, height=height, use_container_width=True)
+        st.dataframe(shrink_for_display(df), height=height, use_container_width=True)
 
 
 def build_symbol(expiry: str, strike: int, option_type: str) -> str:
@@ -35,8 +72,7 @@ def build_symbol(expiry: str, strike: int, option_type: str) -> str:
 
 def parse_symbol(symbol: str) -> dict:
     """Parse symbol into components: NIFTY30DEC2526000CE -> expiry, strike, type"""
-    pattern = r"NIFTY(\d{2}[A-Z]{3}\d{2})(\d+)(CE|PE)"
-    match = re.match(pattern, symbol)
+    match = SYMBOL_RE.match(symbol)
     if match:
         return {
             "expiry": match.group(1),
@@ -46,6 +82,13 @@ def parse_symbol(symbol: str) -> dict:
     return None
 
 
+def cumulative_vwap(ohlc_df: pd.DataFrame) -> np.ndarray:
+    """Session VWAP from typical price, computed on raw NumPy arrays"""
+    h, l, c, v = (ohlc_df[x].to_numpy(dtype=float) for x in ('high', 'low', 'close', 'volume'))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.cumsum((h + l + c) / 3 * v) / np.cumsum(v)
+
+
 def candlestick_chart(ohlc_df: pd.DataFrame, swings_df: pd.DataFrame,
                      position_df: pd.DataFrame, symbol: str):
     """
@@ -62,6 +105,29 @@ def candlestick_chart(ohlc_df: pd.DataFrame, swings_df: pd.DataFrame,
         st.warning(f"No OHLC data available for {symbol}")
         return
 
+    fig = build_candlestick_figure(ohlc_df, swings_df, position_df, symbol)
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def _frame_fingerprint(df: pd.DataFrame):
+    """Cheap cache key for chart inputs: shape, columns and the last row.
+
+    Bars only ever append or rewrite the latest row, so this changes whenever
+    the chart would.
+    """
+    if df.empty:
+        return (df.shape, tuple(df.columns))
+    return (df.shape, tuple(df.columns), tuple(map(str, df.iloc[-1])))
+
+
+@st.cache_data(ttl=FAST_REFRESH, show_spinner=False, max_entries=16,
+               hash_funcs={pd.DataFrame: _frame_fingerprint})
+def build_candlestick_figure(ohlc_df: pd.DataFrame, swings_df: pd.DataFrame,
+                             position_df: pd.DataFrame, symbol: str) -> "go.Figure":
+    """Build the candlestick figure; cached until the inputs' last rows change"""
+    # Imported lazily: plotly is only needed once a chart is actually drawn
+    import plotly.graph_objects as go
+
     # Ensure we have a copy to avoid SettingWithCopyWarning
     ohlc_df = ohlc_df.copy()
 
@@ -74,11 +140,7 @@ def candlestick_chart(ohlc_df: pd.DataFrame, swings_df: pd.DataFrame,
 
     # Calculate VWAP if not already calculated
     if 'vwap' not in ohlc_df.columns:
-        ohlc_df['typical_price'] = (ohlc_df['high'] + ohlc_df['low'] + ohlc_df['close']) / 3
-        ohlc_df['tp_volume'] = ohlc_df['typical_price'] * ohlc_df['volume']
-        ohlc_df['cumulative_tp_volume'] = ohlc_df['tp_volume'].cumsum()
-        ohlc_df['cumulative_volume'] = ohlc_df['volume'].cumsum()
-        ohlc_df['vwap'] = ohlc_df['cumulative_tp_volume'] / ohlc_df['cumulative_volume']
+        ohlc_df['vwap'] = cumulative_vwap(ohlc_df)
 
     # Remove duplicate swings
     if not swings_df.empty:
@@ -259,4 +321,4 @@ def candlestick_chart(ohlc_df: pd.DataFrame, swings_df: pd.DataFrame,
         font=dict(size=12, color="white")
     )
 
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
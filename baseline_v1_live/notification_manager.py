@@ -15,9 +15,13 @@ Usage:
 """
 
 import logging
+import queue
+import time
+from collections import Counter, deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-import pytz
+from threading import Lock, Thread, Timer
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
 
 try:
     from .config import (
@@ -36,8 +40,90 @@ except ImportError:
         NOTIFICATION_AGGREGATION_WINDOW,
     )
 
+try:
+    from .state_manager import error_notification_hash
+except ImportError:
+    from state_manager import error_notification_hash
+
 logger = logging.getLogger(__name__)
-IST = pytz.timezone('Asia/Kolkata')
+IST = ZoneInfo('Asia/Kolkata')
+
+# SQL is kept in constants so each statement is one stable string that hits
+# the connection's prepared-statement cache on every call
+_SQL_THROTTLE_STATE = '''
+    SELECT last_notification_sent_ts, is_resolved
+    FROM error_notifications_log
+    WHERE error_hash = ?
+'''
+
+# Notify when critical, first seen, previously resolved, never notified (only
+# logged via aggregation) or outside the throttle window. Every SET expression
+# sees the pre-update row, so the condition is evaluated consistently, and
+# last_occurrence_notified carries the decision out through RETURNING (which
+# only sees the updated row).
+_SHOULD_SEND = ('(:critical OR is_resolved OR last_notification_sent_ts IS NULL '
+                'OR :now_ts - last_notification_sent_ts >= :window)')
+
+_SQL_UPSERT_NOTIFIED = f'''
+    INSERT INTO error_notifications_log
+    (error_hash, error_type, error_message, first_occurrence, last_occurrence,
+     occurrence_count, last_notification_sent, last_notification_sent_ts,
+     notification_count, is_resolved, last_occurrence_notified)
+    VALUES (:hash, :type, :msg, :now, :now, 1, :now, :now_ts, 1, 0, 1)
+    ON CONFLICT (error_hash) DO UPDATE SET
+        last_occurrence = excluded.last_occurrence,
+        occurrence_count = occurrence_count + 1,
+        last_notification_sent = CASE WHEN {_SHOULD_SEND}
+            THEN excluded.last_notification_sent ELSE last_notification_sent END,
+        last_notification_sent_ts = CASE WHEN {_SHOULD_SEND}
+            THEN excluded.last_notification_sent_ts ELSE last_notification_sent_ts END,
+        notification_count = notification_count + (CASE WHEN {_SHOULD_SEND} THEN 1 ELSE 0 END),
+        is_resolved = CASE WHEN {_SHOULD_SEND} THEN 0 ELSE is_resolved END,
+        last_occurrence_notified = CASE WHEN {_SHOULD_SEND} THEN 1 ELSE 0 END
+    RETURNING occurrence_count, notification_count, last_occurrence_notified AS sent
+'''
+
+_SQL_UPSERT_OCCURRENCE = '''
+    INSERT INTO error_notifications_log
+    (error_hash, error_type, error_message, first_occurrence, last_occurrence,
+     occurrence_count, last_notification_sent, notification_count, is_resolved,
+     last_occurrence_notified)
+    VALUES (?, ?, ?, ?, ?, 1, NULL, 0, 0, 0)
+    ON CONFLICT (error_hash) DO UPDATE SET
+        last_occurrence = excluded.last_occurrence,
+        occurrence_count = occurrence_count + 1,
+        last_occurrence_notified = 0
+'''
+
+_SQL_MARK_RESOLVED = '''
+    UPDATE error_notifications_log
+    SET is_resolved = 1,
+        resolved_at = ?
+    WHERE error_hash = ?
+    AND is_resolved = 0
+'''
+
+_SQL_MARK_TYPE_RESOLVED = '''
+    UPDATE error_notifications_log
+    SET is_resolved = 1,
+        resolved_at = ?
+    WHERE error_type = ?
+    AND is_resolved = 0
+'''
+
+# Most recent unresolved errors (dashboards never show more), plus the full count
+_SQL_UNRESOLVED = '''
+    SELECT error_type, error_message, first_occurrence, last_occurrence,
+           occurrence_count, notification_count,
+           (SELECT COUNT(*) FROM error_notifications_log WHERE is_resolved = 0) AS unresolved_count
+    FROM error_notifications_log
+    WHERE is_resolved = 0
+    ORDER BY last_occurrence DESC
+    LIMIT 500
+'''
+
+_SUMMARY_FIELDS = ('error_type', 'error_message', 'first_occurrence', 'last_occurrence',
+                   'occurrence_count', 'notification_count')
 
 
 class NotificationManager:
@@ -56,6 +142,16 @@ class NotificationManager:
         'SYSTEM_RECOVERED': 0,  # Always send recovery notifications
     }
 
+    # Telegram message header per error type (plain text; unknown types get ALERT)
+    MESSAGE_PREFIXES = {error_type: f"[ALERT] {error_type}\n\n" for error_type in THROTTLE_WINDOWS}
+    MESSAGE_PREFIXES['SYSTEM_RECOVERED'] = "[SUCCESS] SYSTEM_RECOVERED\n\n"
+
+    # Cap on queued errors per aggregation window (oldest dropped in an error storm)
+    MAX_PENDING_ERRORS = 10_000
+
+    # Cap on Telegram messages waiting for the sender thread
+    MAX_QUEUED_MESSAGES = 1000
+
     def __init__(self, telegram_notifier, state_manager):
         """
         Initialize notification manager
@@ -66,42 +162,56 @@ class NotificationManager:
         """
         self.telegram = telegram_notifier
         self.state = state_manager
-        self.pending_errors = []  # For aggregation
-        self.last_aggregation_time = None
+        self.pending_errors = deque(maxlen=self.MAX_PENDING_ERRORS)  # For aggregation
+        self.last_aggregation_time = None  # Wall clock of the window's first error (for display)
+        self._agg_start_mono: Optional[float] = None
+        self._pending_lock = Lock()
+        self._aggregation_timer = None
+
+        # Telegram sends are HTTP calls; a single daemon thread makes them so
+        # error paths only enqueue
+        self._send_q = queue.Queue(maxsize=self.MAX_QUEUED_MESSAGES)
+        Thread(target=self._sender_loop, daemon=True).start()
+
+        # (error_type, error_msg) -> (last_sent monotonic, is_resolved); lets a
+        # noisy error be throttled without a database read per occurrence
+        self._throttle_cache: Dict[Tuple[str, str], Tuple[float, bool]] = {}
+        self._throttle_cache_ttl = max(self.THROTTLE_WINDOWS.values())
 
         logger.info("NotificationManager initialized")
 
-    def should_send_notification(self, error_type: str, error_msg: str) -> bool:
+    def should_send_notification(self, error_type: str, error_msg: str,
+                                 error_hash: Optional[bytes] = None) -> bool:
         """
         Check if notification should be sent based on throttling rules
 
         Args:
             error_type: Error type (e.g., 'STARTUP_FAILURE')
             error_msg: Error message
+            error_hash: Precomputed error_notification_hash (computed if omitted)
 
         Returns:
             True if notification should be sent
         """
-        cursor = self.state.conn.cursor()
-
         # Get throttle window for this error type
         throttle_window = self.THROTTLE_WINDOWS.get(error_type, 3600)  # Default 1 hour
 
-        # Check if error exists in log
-        cursor.execute('''
-            SELECT last_notification_sent, is_resolved
-            FROM error_notifications_log
-            WHERE error_type = ?
-            AND error_message = ?
-        ''', (error_type, error_msg))
+        # Fast path: notified recently from this process - still throttled
+        if self._throttled_in_memory(error_type, error_msg, throttle_window):
+            return False
+
+        if error_hash is None:
+            error_hash = error_notification_hash(error_type, error_msg)
 
-        row = cursor.fetchone()
+        # Check if error exists in log
+        with self.state.db_lock:
+            row = self.state.conn.execute(_SQL_THROTTLE_STATE, (error_hash,)).fetchone()
 
         if not row:
             # First time seeing this error - send notification
             return True
 
-        last_notification_sent = row[0]
+        last_notification_sent_ts = row[0]
         is_resolved = row[1]
 
         # If error was resolved, always send new notification (it's reoccurring)
@@ -113,13 +223,14 @@ class NotificationManager:
             return True
 
         # Check if enough time has passed since last notification
-        if last_notification_sent:
-            last_sent_time = datetime.fromisoformat(last_notification_sent)
-            now = datetime.now(IST)
-            time_since_last = (now - last_sent_time).total_seconds()
+        if last_notification_sent_ts is not None:
+            time_since_last = time.time() - last_notification_sent_ts
 
             if time_since_last < throttle_window:
-                # Still within throttle window - don't send
+                # Still within throttle window - don't send (remember it so the
+                # next occurrences skip the database)
+                self._throttle_cache[(error_type, error_msg)] = (
+                    time.monotonic() - time_since_last, False)
                 return False
 
         # Outside throttle window - send notification
@@ -134,120 +245,138 @@ class NotificationManager:
             error_msg: Error message
             is_critical: If True, bypass throttling and send immediately
         """
-        now = datetime.now(IST)
-        cursor = self.state.conn.cursor()
-
-        # Check if notification should be sent
-        if not is_critical and not self.should_send_notification(error_type, error_msg):
-            # Within throttle window - just update occurrence count
-            cursor.execute('''
-                UPDATE error_notifications_log
-                SET last_occurrence = ?,
-                    occurrence_count = occurrence_count + 1
-                WHERE error_type = ?
-                AND error_message = ?
-            ''', (now.isoformat(), error_type, error_msg))
+        now_dt = datetime.now(IST)
+        now = now_dt.isoformat()
+        now_ts = int(now_dt.timestamp())
+        throttle_window = self.THROTTLE_WINDOWS.get(error_type, 3600)  # Default 1 hour
+        error_hash = error_notification_hash(error_type, error_msg)
+
+        # Notified recently from this process: only record the occurrence
+        if not is_critical and self._throttled_in_memory(error_type, error_msg, throttle_window):
+            with self.state.db_lock:
+                self.state.conn.execute(_SQL_UPSERT_OCCURRENCE,
+                                        (error_hash, error_type, error_msg, now, now))
+                self.state.conn.commit()
+            logger.debug(f"[NOTIFICATION] Throttled: {error_type} (within throttle window)")
+            return
 
+        # Record the occurrence and decide whether to notify in one statement
+        with self.state.db_lock:
+            cursor = self.state.conn.execute(_SQL_UPSERT_NOTIFIED, {
+                'hash': error_hash, 'type': error_type, 'msg': error_msg, 'now': now,
+                'now_ts': now_ts, 'window': throttle_window, 'critical': int(is_critical),
+            })
+            occurrence_count, notification_count, sent = cursor.fetchone()
             self.state.conn.commit()
 
+        if not sent:
             logger.debug(f"[NOTIFICATION] Throttled: {error_type} (within throttle window)")
             return
 
-        # Check if error already exists in log
-        cursor.execute('''
-            SELECT id, first_occurrence, occurrence_count, notification_count
-            FROM error_notifications_log
-            WHERE error_type = ?
-            AND error_message = ?
-        ''', (error_type, error_msg))
-
-        row = cursor.fetchone()
-
-        if row:
-            # Update existing entry
-            error_id, first_occurrence, occurrence_count, notification_count = row
-
-            cursor.execute('''
-                UPDATE error_notifications_log
-                SET last_occurrence = ?,
-                    occurrence_count = occurrence_count + 1,
-                    last_notification_sent = ?,
-                    notification_count = notification_count + 1,
-                    is_resolved = 0
-                WHERE id = ?
-            ''', (now.isoformat(), now.isoformat(), error_id))
-
-            logger.info(f"[NOTIFICATION] Sending throttled notification for {error_type} "
-                       f"(occurrence #{occurrence_count + 1}, notification #{notification_count + 1})")
+        if occurrence_count == 1:
+            logger.info(f"[NOTIFICATION] Sending first notification for {error_type}")
         else:
-            # Insert new entry
-            cursor.execute('''
-                INSERT INTO error_notifications_log
-                (error_type, error_message, first_occurrence, last_occurrence,
-                 occurrence_count, last_notification_sent, notification_count, is_resolved)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (error_type, error_msg, now.isoformat(), now.isoformat(),
-                  1, now.isoformat(), 1, 0))
+            logger.info(f"[NOTIFICATION] Sending throttled notification for {error_type} "
+                       f"(occurrence #{occurrence_count}, notification #{notification_count})")
 
-            logger.info(f"[NOTIFICATION] Sending first notification for {error_type}")
+        self._remember_sent(error_type, error_msg)
 
-        self.state.conn.commit()
-
-        # Format message with emoji prefix
-        emoji_map = {
-            'STARTUP_FAILURE': 'ALERT',
-            'WEBSOCKET_AUTH_FAILED': 'ALERT',
-            'WEBSOCKET_DOWN': 'ALERT',
-            'BROKER_DISCONNECTED': 'ALERT',
-            'DATABASE_ERROR': 'ALERT',
-            'OPENALGO_DOWN': 'ALERT',
-            'SYSTEM_RECOVERED': 'SUCCESS',
-        }
+        # Send to Telegram
+        prefix = self.MESSAGE_PREFIXES.get(error_type) or f"[ALERT] {error_type}\n\n"
+        self._enqueue_message(prefix + error_msg)
+
+    def _throttled_in_memory(self, error_type: str, error_msg: str, throttle_window: int) -> bool:
+        """True if this process notified the error within its window and it is not resolved"""
+        cached = self._throttle_cache.get((error_type, error_msg))
+        return bool(cached and not cached[1] and throttle_window
+                    and time.monotonic() - cached[0] < throttle_window)
+
+    def _remember_sent(self, error_type: str, error_msg: str):
+        """Record a sent notification in the throttle cache, evicting expired entries"""
+        now = time.monotonic()
+        expired = [key for key, (sent_at, _) in self._throttle_cache.items()
+                   if now - sent_at >= self._throttle_cache_ttl]
+        for key in expired:
+            del self._throttle_cache[key]
+        self._throttle_cache[(error_type, error_msg)] = (now, False)
+
+    def _enqueue_message(self, message: str):
+        """Hand a message to the sender thread (dropped if the queue is full)"""
+        try:
+            self._send_q.put_nowait(message)
+        except queue.Full:
+            logger.warning(f"[NOTIFICATION] Send queue full, dropping message: {message[:80]!r}")
+
+    def _sender_loop(self):
+        """Send queued messages to Telegram (plain text, no HTML)"""
+        while True:
+            message = self._send_q.get()
+            try:
+                self.telegram.send_message(message, parse_mode=None)
+            except Exception as e:
+                logger.error(f"[NOTIFICATION] Telegram send failed: {e}")
+            finally:
+                self._send_q.task_done()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Wait for queued messages to be sent (call before exiting)
 
-        prefix = emoji_map.get(error_type, 'ALERT')
+        Args:
+            timeout: Max seconds to wait
 
-        # Send to Telegram
-        formatted_msg = f"[{prefix}] {error_type}\n\n{error_msg}"
-        self.telegram.send_message(formatted_msg, parse_mode=None)  # Plain text, no HTML
+        Returns:
+            True if the queue drained in time
+        """
+        deadline = time.monotonic() + timeout
+        while self._send_q.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
 
     def aggregate_and_send_errors(self):
         """
         Aggregate pending errors and send as single notification
 
-        Called when aggregation window expires.
+        Called when aggregation window expires (from the aggregation timer
+        if no further error arrives to trigger it).
         """
-        if not self.pending_errors:
-            return
-
-        now = datetime.now(IST)
+        with self._pending_lock:
+            if self._aggregation_timer is not None:
+                self._aggregation_timer.cancel()
+                self._aggregation_timer = None
+            if not self.pending_errors:
+                return
+
+            # Take the batch and clear pending errors
+            pending = list(self.pending_errors)
+            first_seen = self.last_aggregation_time
+            self.pending_errors.clear()
+            self.last_aggregation_time = None
+            self._agg_start_mono = None
 
         # Group errors by type
-        error_counts = {}
-        for error_type, error_msg in self.pending_errors:
-            if error_type not in error_counts:
-                error_counts[error_type] = 0
-            error_counts[error_type] += 1
+        error_counts = Counter(error_type for error_type, _ in pending)
 
-        # Format aggregated message
+        # Format aggregated message (most frequent first)
         lines = ["ALERT: MULTIPLE ERRORS DETECTED\n"]
-        for error_type, count in error_counts.items():
-            lines.append(f"- {error_type}: {count} occurrence(s)")
+        lines.extend(f"- {error_type}: {count} occurrence(s)"
+                     for error_type, count in error_counts.most_common())
 
-        lines.append(f"\nFirst seen: {self.last_aggregation_time.strftime('%H:%M:%S')} IST")
+        lines.append(f"\nFirst seen: {first_seen.strftime('%H:%M:%S')} IST")
         lines.append("Action: Check system logs and restart if needed.")
 
         message = "\n".join(lines)
 
         # Send aggregated notification
-        self.telegram.send_message(message, parse_mode=None)
-
-        # Log each error to database
-        for error_type, error_msg in self.pending_errors:
-            self._log_error_occurrence(error_type, error_msg)
+        self._enqueue_message(message)
 
-        # Clear pending errors
-        self.pending_errors = []
-        self.last_aggregation_time = None
+        # Log all errors to database in one transaction (this may run on the
+        # timer thread, so hold the connection lock across write and commit)
+        with self.state.db_lock:
+            self._log_error_occurrences(pending)
+            self.state.conn.commit()
 
         logger.info(f"[NOTIFICATION] Sent aggregated notification for {len(error_counts)} error types")
 
@@ -259,60 +388,44 @@ class NotificationManager:
             error_type: Error type
             error_msg: Error message
         """
-        now = datetime.now(IST)
+        now = time.monotonic()
+
+        with self._pending_lock:
+            # Initialize aggregation window if this is first error, and make
+            # sure it is flushed even if no further error arrives
+            if self._agg_start_mono is None:
+                self._agg_start_mono = now
+                self.last_aggregation_time = datetime.now(IST)
+                self._aggregation_timer = Timer(NOTIFICATION_AGGREGATION_WINDOW,
+                                                self.aggregate_and_send_errors)
+                self._aggregation_timer.daemon = True
+                self._aggregation_timer.start()
 
-        # Initialize aggregation window if this is first error
-        if self.last_aggregation_time is None:
-            self.last_aggregation_time = now
+            # Add to pending errors
+            self.pending_errors.append((error_type, error_msg))
 
-        # Add to pending errors
-        self.pending_errors.append((error_type, error_msg))
+            # Check if aggregation window expired
+            time_since_first = now - self._agg_start_mono
 
-        # Check if aggregation window expired
-        time_since_first = (now - self.last_aggregation_time).total_seconds()
         if time_since_first >= NOTIFICATION_AGGREGATION_WINDOW:
             self.aggregate_and_send_errors()
 
-    def _log_error_occurrence(self, error_type: str, error_msg: str):
+    def _log_error_occurrences(self, errors: List[Tuple[str, str]]):
         """
-        Log error occurrence to database (without sending notification)
+        Log error occurrences to database (without sending notification)
+
+        Does not commit; the caller commits once for the whole batch and
+        must hold state.db_lock.
 
         Args:
-            error_type: Error type
-            error_msg: Error message
+            errors: List of (error_type, error_msg)
         """
-        now = datetime.now(IST)
-        cursor = self.state.conn.cursor()
-
-        # Check if error exists
-        cursor.execute('''
-            SELECT id
-            FROM error_notifications_log
-            WHERE error_type = ?
-            AND error_message = ?
-        ''', (error_type, error_msg))
-
-        row = cursor.fetchone()
-
-        if row:
-            # Update existing entry
-            cursor.execute('''
-                UPDATE error_notifications_log
-                SET last_occurrence = ?,
-                    occurrence_count = occurrence_count + 1
-                WHERE id = ?
-            ''', (now.isoformat(), row[0]))
-        else:
-            # Insert new entry (no notification sent yet)
-            cursor.execute('''
-                INSERT INTO error_notifications_log
-                (error_type, error_message, first_occurrence, last_occurrence,
-                 occurrence_count, last_notification_sent, notification_count, is_resolved)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (error_type, error_msg, now.isoformat(), now.isoformat(),
-                  1, None, 0, 0))
+        now = datetime.now(IST).isoformat()
+        rows = [(error_notification_hash(error_type, error_msg), error_type, error_msg, now, now)
+                for error_type, error_msg in errors]
 
-        self.state.conn.commit()
+        # New entries have no notification sent yet
+        self.state.conn.executemany(_SQL_UPSERT_OCCURRENCE, rows)
 
     def mark_resolved(self, error_type: str, error_msg: Optional[str] = None):
         """
@@ -323,28 +436,23 @@ class NotificationManager:
             error_msg: Optional specific error message (if None, mark all of this type)
         """
         now = datetime.now(IST)
-        cursor = self.state.conn.cursor()
-
-        if error_msg:
-            cursor.execute('''
-                UPDATE error_notifications_log
-                SET is_resolved = 1,
-                    resolved_at = ?
-                WHERE error_type = ?
-                AND error_message = ?
-                AND is_resolved = 0
-            ''', (now.isoformat(), error_type, error_msg))
-        else:
-            cursor.execute('''
-                UPDATE error_notifications_log
-                SET is_resolved = 1,
-                    resolved_at = ?
-                WHERE error_type = ?
-                AND is_resolved = 0
-            ''', (now.isoformat(), error_type))
 
-        rows_updated = cursor.rowcount
-        self.state.conn.commit()
+        with self.state.db_lock:
+            if error_msg:
+                cursor = self.state.conn.execute(
+                    _SQL_MARK_RESOLVED,
+                    (now.isoformat(), error_notification_hash(error_type, error_msg)))
+            else:
+                cursor = self.state.conn.execute(_SQL_MARK_TYPE_RESOLVED,
+                                                 (now.isoformat(), error_type))
+
+            rows_updated = cursor.rowcount
+            self.state.conn.commit()
+
+        # Resolved errors notify again on recurrence
+        for key, (sent_at, _) in list(self._throttle_cache.items()):
+            if key[0] == error_type and (not error_msg or key[1] == error_msg):
+                self._throttle_cache[key] = (sent_at, True)
 
         if rows_updated > 0:
             logger.info(f"[NOTIFICATION] Marked {rows_updated} error(s) as resolved: {error_type}")
@@ -356,36 +464,15 @@ class NotificationManager:
         Returns:
             Dict with error summary
         """
-        cursor = self.state.conn.cursor()
-
-        # Get all unresolved errors
-        cursor.execute('''
-            SELECT error_type, error_message, first_occurrence, last_occurrence,
-                   occurrence_count, notification_count
-            FROM error_notifications_log
-            WHERE is_resolved = 0
-            ORDER BY last_occurrence DESC
-        ''')
-
-        rows = cursor.fetchall()
-
-        unresolved_errors = []
-        for row in rows:
-            unresolved_errors.append({
-                'error_type': row[0],
-                'error_message': row[1],
-                'first_occurrence': row[2],
-                'last_occurrence': row[3],
-                'occurrence_count': row[4],
-                'notification_count': row[5],
-            })
+        # Get unresolved errors (rows are sqlite3.Row, so fields by name)
+        with self.state.db_lock:
+            rows = self.state.conn.execute(_SQL_UNRESOLVED).fetchall()
 
         return {
-            'unresolved_count': len(unresolved_errors),
-            'unresolved_errors': unresolved_errors,
+            'unresolved_count': rows[0]['unresolved_count'] if rows else 0,
+            'unresolved_errors': [{field: row[field] for field in _SUMMARY_FIELDS} for row in rows],
         }
 
-
 if __name__ == '__main__':
     # Test notification manager
     logging.basicConfig(level=logging.INFO)
@@ -416,4 +503,5 @@ if __name__ == '__main__':
     summary = notification_manager.get_error_summary()
     print(f"Unresolved errors: {summary['unresolved_count']}")
 
+    notification_manager.flush()
     state.close()
@@ -65,8 +65,12 @@ class OrderManager:
         # Filled orders tracking
         self.filled_orders = []
         
-        # Last orderbook check time
+        # Last orderbook check time (IST, for logging)
         self.last_orderbook_check = None
+
+        # Orderbook indexed by order id, reused for ORDER_FILL_CHECK_INTERVAL
+        # seconds: (monotonic fetch time, {orderid: order})
+        self._orderbook_cache = (None, {})
         
         # Emergency SL failure tracking
         self.sl_placement_failures = 0
@@ -581,38 +585,38 @@ class OrderManager:
         newly_filled = []
         
         try:
-            # Get orderbook
-            response = self.client.orderbook()
+            # Get orderbook (one REST call per ORDER_FILL_CHECK_INTERVAL)
+            orders_by_id = self._get_orderbook_index()
             
-            if response.get('status') != 'success':
-                logger.error(f"Failed to fetch orderbook: {response}")
+            if orders_by_id is None:
                 return []
             
-            orders = response.get('data', [])
-            
             # Check pending limit orders
             for symbol in list(self.pending_limit_orders.keys()):
                 order_info = self.pending_limit_orders[symbol]
                 order_id = order_info['order_id']
                 
                 # Find order in orderbook
-                order_details = self._find_order_status(orders, order_id)
+                order = orders_by_id.get(order_id)
                 
-                if not order_details:
+                if not order:
                     continue
                 
+                # CRITICAL FIX: OpenAlgo uses 'order_status' not 'status'
+                status = order.get('order_status', '').lower()
+                
                 # 🚨 CRITICAL: Explicit status validation
-                if order_details['status'] == 'rejected':
+                if status == 'rejected':
                     logger.error(
-                        f"Order {order_id} REJECTED: {symbol} - {order_details['rejected_reason']}"
+                        f"Order {order_id} REJECTED: {symbol} - {order.get('rejected_reason', '')}"
                     )
                     del self.pending_limit_orders[symbol]
                     continue
                 
-                if order_details['status'] == 'complete':
+                if status == 'complete':
                     # ✅ Use FILLED QUANTITY from broker, not intended quantity
-                    filled_qty = order_details['filled_quantity']
-                    fill_price = order_details['average_price'] or order_info['limit_price']
+                    filled_qty = int(order.get('filled_quantity', 0))
+                    fill_price = float(order.get('average_price', 0)) or order_info['limit_price']
                     
                     filled_info = {
                         'symbol': symbol,
@@ -634,29 +638,37 @@ class OrderManager:
                         f"{symbol} {filled_qty} @ {fill_price:.2f} (intended: {order_info['quantity']})"
                     )
             
-            self.last_orderbook_check = datetime.now(IST)
-            
         except Exception as e:
             logger.error(f"Exception checking fills: {e}")
         
         return newly_filled
     
-    def _find_order_status(self, orders: List[Dict], order_id: str) -> Optional[Dict]:
-        """Find order details in orderbook response
+    def _get_orderbook_index(self) -> Optional[Dict[str, Dict]]:
+        """Orderbook as {orderid: order}, fetched at most once per ORDER_FILL_CHECK_INTERVAL
         
         Returns:
-            Order dict with status and filled_quantity, or None
+            Orders keyed by order id, or None if the orderbook could not be fetched
         """
-        for order in orders:
-            if order.get('orderid') == order_id:
-                # CRITICAL FIX: OpenAlgo uses 'order_status' not 'status'
-                return {
-                    'status': order.get('order_status', '').lower(),
-                    'filled_quantity': int(order.get('filled_quantity', 0)),
-                    'average_price': float(order.get('average_price', 0)),
-                    'rejected_reason': order.get('rejected_reason', ''),
-                }
-        return None
+        fetched_at, orders_by_id = self._orderbook_cache
+        now = time.monotonic()
+        if fetched_at is not None and now - fetched_at < ORDER_FILL_CHECK_INTERVAL:
+            return orders_by_id
+        
+        response = self.client.orderbook()
+        
+        if response.get('status') != 'success':
+            logger.error(f"Failed to fetch orderbook: {response}")
+            return None
+        
+        # Single pass over the orderbook; lookups per pending order are O(1)
+        orders_by_id = {
+            order.get('orderid'): order
+            for order in response.get('data') or []
+            if isinstance(order, dict)
+        }
+        self._orderbook_cache = (now, orders_by_id)
+        self.last_orderbook_check = datetime.now(IST)
+        return orders_by_id
     
     def cancel_all_orders(self):
         """Cancel ALL pending limit and SL orders (for ±5R exit)"""
@@ -24,10 +24,12 @@ Database Selection:
 - Busy timeout for lock handling (SQLite only)
 """
 
+import hashlib
 import logging
 import sqlite3
 import json
 import os
+import threading
 from datetime import datetime, date, timedelta
 from typing import Dict, List, Optional, Any
 from functools import wraps
@@ -53,6 +55,21 @@ IST = pytz.timezone('Asia/Kolkata')
 DATABASE_URL = os.environ.get('DATABASE_URL', '')
 
 
+def with_db_lock(func):
+    """
+    Decorator that holds the StateManager's db_lock for the whole call
+
+    The connection is shared across threads (check_same_thread=False), so
+    every execute and the commit that ends it must run under one lock.
+    """
+    @wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self.db_lock:
+            return func(self, *args, **kwargs)
+
+    return wrapper
+
+
 def atomic_transaction(func):
     """
     Decorator for atomic database transactions
@@ -62,6 +79,7 @@ def atomic_transaction(func):
     Works with both SQLite and PostgreSQL.
     """
     @wraps(func)
+    @with_db_lock
     def wrapper(self, *args, **kwargs):
         try:
             if self.db_type == 'sqlite':
@@ -106,6 +124,11 @@ def atomic_transaction(func):
     return wrapper
 
 
+def error_notification_hash(error_type: str, error_msg: Optional[str]) -> bytes:
+    """16-byte dedup key for error_notifications_log (type + message)"""
+    return hashlib.md5(f"{error_type}\x00{error_msg}".encode()).digest()
+
+
 class StateManager:
     """
     Manage persistent state in SQLite or PostgreSQL
@@ -118,6 +141,9 @@ class StateManager:
     def __init__(self, db_path: str = STATE_DB_PATH):
         self.db_path = db_path
         self.conn = None
+        # Guards self.conn: held across each execute...commit sequence by
+        # StateManager methods and by callers that use the connection directly
+        self.db_lock = threading.RLock()
         self.db_type = 'postgresql' if DATABASE_URL.startswith('postgresql://') else 'sqlite'
         self.placeholder = '%s' if self.db_type == 'postgresql' else '?'
         self._init_database()
@@ -311,6 +337,32 @@ class StateManager:
             )
         ''')
 
+        # Highest high per symbol, maintained on every bar write so the
+        # dashboard's SL% queries don't re-aggregate the bars table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS bars_high_rollup (
+                symbol TEXT PRIMARY KEY,
+                highest_high REAL
+            )
+        ''')
+
+        # Active candidates with their live SL ratio computed once, so the
+        # dashboard filters on a plain column instead of re-deriving it
+        cursor.execute('''
+            CREATE OR REPLACE VIEW stage2_candidates AS
+            SELECT
+                sc.symbol,
+                sc.swing_low,
+                sc.vwap_at_swing,
+                sc.timestamp,
+                sc.option_type,
+                b.highest_high,
+                (b.highest_high + 1 - sc.swing_low) / sc.swing_low AS sl_ratio
+            FROM swing_candidates sc
+            INNER JOIN bars_high_rollup b ON sc.symbol = b.symbol
+            WHERE sc.active = 1
+        ''')
+
         # Filter rejections table (for historical diagnostics)
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS filter_rejections (
@@ -327,12 +379,15 @@ class StateManager:
             )
         ''')
 
+        self._create_indexes(cursor)
+        self._rebuild_bars_high_rollup(cursor)
+
         self.conn.commit()
         logger.info("PostgreSQL database schema initialized")
 
     def _init_sqlite(self):
         """Initialize SQLite database connection and schema with WAL mode"""
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
         self.conn.row_factory = sqlite3.Row
 
         # 🔴 PHASE 1: Enable WAL mode for concurrent reads/writes
@@ -342,6 +397,15 @@ class StateManager:
         # Increase busy timeout to 5 seconds (handle concurrent access)
         self.conn.execute("PRAGMA busy_timeout=5000;")
 
+        # WAL only needs the checkpoint fsynced; NORMAL skips the per-commit sync
+        # of the log (a power loss can drop the last commits, never corrupt).
+        # Larger page cache + mmap for the read side, temp B-trees in memory.
+        self.conn.execute("PRAGMA synchronous=NORMAL;")
+        self.conn.execute("PRAGMA wal_autocheckpoint=1000;")
+        self.conn.execute("PRAGMA temp_store=MEMORY;")
+        self.conn.execute("PRAGMA mmap_size=268435456;")
+        self.conn.execute("PRAGMA cache_size=-65536;")
+
         # Set IMMEDIATE isolation for writes (acquire write lock immediately)
         self.conn.isolation_level = 'IMMEDIATE'
 
@@ -510,6 +574,32 @@ class StateManager:
             )
         ''')
 
+        # Highest high per symbol, maintained on every bar write so the
+        # dashboard's SL% queries don't re-aggregate the bars table
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS bars_high_rollup (
+                symbol TEXT PRIMARY KEY,
+                highest_high REAL
+            )
+        ''')
+
+        # Active candidates with their live SL ratio computed once, so the
+        # dashboard filters on a plain column instead of re-deriving it
+        cursor.execute('''
+            CREATE VIEW IF NOT EXISTS stage2_candidates AS
+            SELECT
+                sc.symbol,
+                sc.swing_low,
+                sc.vwap_at_swing,
+                sc.timestamp,
+                sc.option_type,
+                b.highest_high,
+                (b.highest_high + 1 - sc.swing_low) / sc.swing_low AS sl_ratio
+            FROM swing_candidates sc
+            INNER JOIN bars_high_rollup b ON sc.symbol = b.symbol
+            WHERE sc.active = 1
+        ''')
+
         # Filter rejections table (for historical diagnostics)
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS filter_rejections (
@@ -526,9 +616,28 @@ class StateManager:
             )
         ''')
 
+        self._create_indexes(cursor)
+        self._rebuild_bars_high_rollup(cursor)
+
         self.conn.commit()
         logger.info("SQLite database schema initialized")
 
+    def _create_indexes(self, cursor):
+        """Indexes matching the dashboard's WHERE + ORDER BY predicates (scanned in reverse for DESC)"""
+        cursor.execute('CREATE INDEX IF NOT EXISTS ix_positions_open ON positions (is_closed, entry_time)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS ix_pending_orders_placed ON pending_orders (placed_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS ix_best_strikes_current ON best_strikes (is_current, updated_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS ix_trade_log_exit ON trade_log (exit_time)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS ix_all_swings_log_type_time ON all_swings_log (swing_type, swing_time)')
+
+    def _rebuild_bars_high_rollup(self, cursor):
+        """Resync bars_high_rollup from bars (startup, and covers DBs created before the rollup existed)"""
+        cursor.execute('DELETE FROM bars_high_rollup')
+        cursor.execute('''
+            INSERT INTO bars_high_rollup (symbol, highest_high)
+            SELECT symbol, MAX(high) FROM bars GROUP BY symbol
+        ''')
+
     def _execute(self, cursor, sql: str, params: tuple = None):
         """Execute SQL with proper placeholder substitution for the database type"""
         if self.db_type == 'postgresql' and params:
@@ -641,7 +750,10 @@ class StateManager:
                     last_notification_sent TIMESTAMP,
                     notification_count INTEGER DEFAULT 0,
                     is_resolved BOOLEAN DEFAULT 0,
-                    resolved_at TIMESTAMP
+                    resolved_at TIMESTAMP,
+                    error_hash BLOB,
+                    last_notification_sent_ts INTEGER,
+                    last_occurrence_notified INTEGER DEFAULT 0
                 )
             ''')
             self.conn.commit()
@@ -649,6 +761,69 @@ class StateManager:
         else:
             logger.debug("error_notifications_log table already exists")
 
+        # Migration 3b: Dedup error_notifications_log on a fixed-width hash of
+        # (error_type, error_message) instead of comparing the full message text
+        cursor.execute("PRAGMA table_info(error_notifications_log)")
+        columns = {col[1] for col in cursor.fetchall()}
+
+        if 'error_hash' not in columns:
+            logger.info("Migrating error_notifications_log table to add error_hash column...")
+            cursor.execute("ALTER TABLE error_notifications_log ADD COLUMN error_hash BLOB")
+            self.conn.commit()
+            logger.info("Migration complete: Added error_hash column to error_notifications_log")
+
+        cursor.execute("SELECT id, error_type, error_message FROM error_notifications_log "
+                       "WHERE error_hash IS NULL ORDER BY id DESC")
+        unhashed = cursor.fetchall()
+        if unhashed:
+            # Keep the newest row per key; older duplicates would break the unique index
+            cursor.execute("SELECT error_hash FROM error_notifications_log WHERE error_hash IS NOT NULL")
+            seen = {row[0] for row in cursor.fetchall()}
+            updates, duplicates = [], []
+            for row_id, error_type, error_msg in unhashed:
+                key = error_notification_hash(error_type, error_msg)
+                if key in seen:
+                    duplicates.append((row_id,))
+                else:
+                    seen.add(key)
+                    updates.append((key, row_id))
+            cursor.executemany("UPDATE error_notifications_log SET error_hash = ? WHERE id = ?", updates)
+            cursor.executemany("DELETE FROM error_notifications_log WHERE id = ?", duplicates)
+            self.conn.commit()
+            logger.info(f"Migration complete: Hashed {len(updates)} error log rows "
+                       f"(removed {len(duplicates)} duplicates)")
+
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS ix_err_hash ON error_notifications_log (error_hash)")
+
+        # Partial indexes over unresolved rows only (get_error_summary, mark_resolved by type)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_err_unresolved ON error_notifications_log "
+                       "(last_occurrence DESC) WHERE is_resolved = 0")
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_err_type_unresolved ON error_notifications_log "
+                       "(error_type) WHERE is_resolved = 0")
+        self.conn.commit()
+
+        # Migration 3c: Epoch copy of last_notification_sent for the throttle check
+        # (the ISO column is kept for display)
+        if 'last_notification_sent_ts' not in columns:
+            logger.info("Migrating error_notifications_log table to add last_notification_sent_ts column...")
+            cursor.execute("ALTER TABLE error_notifications_log ADD COLUMN last_notification_sent_ts INTEGER")
+            cursor.execute('''
+                UPDATE error_notifications_log
+                SET last_notification_sent_ts = CAST(strftime('%s', last_notification_sent) AS INTEGER)
+                WHERE last_notification_sent IS NOT NULL
+            ''')
+            self.conn.commit()
+            logger.info("Migration complete: Added last_notification_sent_ts column to error_notifications_log")
+
+        # Migration 3d: Whether the latest occurrence sent a notification (returned
+        # by the notify UPSERT as its sent flag)
+        if 'last_occurrence_notified' not in columns:
+            logger.info("Migrating error_notifications_log table to add last_occurrence_notified column...")
+            cursor.execute("ALTER TABLE error_notifications_log "
+                           "ADD COLUMN last_occurrence_notified INTEGER DEFAULT 0")
+            self.conn.commit()
+            logger.info("Migration complete: Added last_occurrence_notified column to error_notifications_log")
+
         # Migration 4: Add operational_state table
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='operational_state'")
         if not cursor.fetchone():
@@ -737,6 +912,7 @@ class StateManager:
 
         # Commit handled by @atomic_transaction decorator
     
+    @with_db_lock
     def load_open_positions(self) -> List[Dict]:
         """Load open positions from database"""
         cursor = self.conn.cursor()
@@ -854,6 +1030,7 @@ class StateManager:
 
         # Commit handled by @atomic_transaction decorator
     
+    @with_db_lock
     def load_daily_state(self) -> Optional[Dict]:
         """Load daily state from database"""
         cursor = self.conn.cursor()
@@ -873,6 +1050,7 @@ class StateManager:
 
         return self._fetchone_dict(cursor)
     
+    @with_db_lock
     def log_trade(self, position_dict: Dict):
         """Log completed trade to database and CSV"""
         if not position_dict['is_closed']:
@@ -982,6 +1160,7 @@ class StateManager:
                 summary.get('daily_exit_reason', '')
             ])
     
+    @with_db_lock
     def cleanup_old_data(self, days_to_keep: int = 30):
         """Delete data older than N days"""
         cutoff_date = (datetime.now(IST).date() - timedelta(days=days_to_keep)).isoformat()
@@ -996,6 +1175,7 @@ class StateManager:
 
         logger.info(f"Cleaned up data older than {days_to_keep} days")
     
+    @with_db_lock
     def save_swing_candidates(self, candidates: Dict):
         """Save current swing candidates (for dashboard)"""
         cursor = self.conn.cursor()
@@ -1025,6 +1205,7 @@ class StateManager:
         
         self.conn.commit()
     
+    @with_db_lock
     def log_swing_detection(self, symbol: str, swing_type: str, swing_price: float,
                            swing_time: datetime, vwap: float, bar_index: int):
         """
@@ -1052,6 +1233,7 @@ class StateManager:
         self.conn.commit()
         logger.debug(f"Logged swing detection: {symbol} {swing_type} @ {swing_price:.2f}")
     
+    @with_db_lock
     def save_best_strikes(self, best_ce: Optional[Dict], best_pe: Optional[Dict]):
         """Save best CE/PE strikes (for dashboard)"""
         cursor = self.conn.cursor()
@@ -1113,6 +1295,7 @@ class StateManager:
         
         self.conn.commit()
     
+    @with_db_lock
     def log_order_trigger(self, option_type: str, action: str, symbol: str,
                          current_price: float, swing_low: float, reason: str):
         """Log order trigger action (for dashboard)"""
@@ -1135,6 +1318,7 @@ class StateManager:
 
         self.conn.commit()
     
+    @with_db_lock
     def log_swing_break(self, symbol: str, swing_low: float, break_price: float,
                        vwap_premium: float, sl_percent: float, passed_filters: bool):
         """Log swing break event (for dashboard)"""
@@ -1157,6 +1341,7 @@ class StateManager:
 
         self.conn.commit()
     
+    @with_db_lock
     def save_latest_bars(self, bars_dict: Dict):
         """Save latest bar data for each symbol (keep all bars from today's session)"""
         cursor = self.conn.cursor()
@@ -1183,6 +1368,12 @@ class StateManager:
                         volume = EXCLUDED.volume
                 ''', params)
 
+                cursor.execute('''
+                    INSERT INTO bars_high_rollup (symbol, highest_high) VALUES (%s, %s)
+                    ON CONFLICT (symbol) DO UPDATE SET
+                        highest_high = GREATEST(bars_high_rollup.highest_high, EXCLUDED.highest_high)
+                ''', (symbol, bar['high']))
+
                 # Keep all bars from today only
                 cursor.execute('''
                     DELETE FROM bars
@@ -1194,6 +1385,12 @@ class StateManager:
                     INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?)
                 ''', params)
 
+                cursor.execute('''
+                    INSERT INTO bars_high_rollup (symbol, highest_high) VALUES (?, ?)
+                    ON CONFLICT (symbol) DO UPDATE SET
+                        highest_high = MAX(highest_high, excluded.highest_high)
+                ''', (symbol, bar['high']))
+
                 # Keep all bars from today only (auto-cleanup handled at market close)
                 cursor.execute('''
                     DELETE FROM bars
@@ -1201,8 +1398,17 @@ class StateManager:
                     AND DATE(timestamp) < DATE('now', 'localtime')
                 ''', (symbol,))
 
+            if cursor.rowcount > 0:
+                # Older days were evicted - their highs may have been the max
+                self._execute(cursor, '''
+                    UPDATE bars_high_rollup
+                    SET highest_high = (SELECT MAX(high) FROM bars WHERE symbol = ?)
+                    WHERE symbol = ?
+                ''', (symbol, symbol))
+
         self.conn.commit()
     
+    @with_db_lock
     def save_filter_rejections(self, rejections: List[Dict]):
         """Save filter rejection details for historical analysis"""
         if not rejections:
@@ -1227,6 +1433,7 @@ class StateManager:
         
         self.conn.commit()
     
+    @with_db_lock
     def reset_daily_dashboard_data(self):
         """
         Reset dashboard-specific tables at start of new trading day
@@ -1281,6 +1488,7 @@ class StateManager:
         self.conn.commit()
         logger.info("[DAILY-RESET] Daily dashboard data reset complete")
     
+    @with_db_lock
     def get_current_state(self) -> str:
         """Get current operational state"""
         cursor = self.conn.cursor()
@@ -1288,6 +1496,7 @@ class StateManager:
         row = cursor.fetchone()
         return row[0] if row else 'STARTING'
 
+    @with_db_lock
     def transition_to(self, new_state: str, reason: str = ""):
         """
         Transition to new operational state
@@ -1314,6 +1523,7 @@ class StateManager:
 
         logger.info(f"[STATE] Transitioned from {old_state} -> {new_state}: {reason}")
 
+    @with_db_lock
     def should_check_health(self) -> bool:
         """
         Check if health check should be performed (in WAITING mode)
@@ -1336,6 +1546,7 @@ class StateManager:
 
         return elapsed >= WAITING_MODE_CHECK_INTERVAL
 
+    @with_db_lock
     def update_last_check(self):
         """Update last health check timestamp"""
         now = datetime.now(IST)
@@ -1350,9 +1561,16 @@ class StateManager:
 
         self.conn.commit()
 
+    @with_db_lock
     def close(self):
         """Close database connection"""
         if self.conn:
+            if self.db_type == 'sqlite':
+                # Refresh query planner statistics for tables that need it
+                try:
+                    self.conn.execute("PRAGMA optimize;")
+                except sqlite3.Error as e:
+                    logger.debug(f"PRAGMA optimize skipped: {e}")
             self.conn.close()
             logger.info("Database connection closed")
 
@@ -0,0 +1,124 @@
+"""
+Test Script for NotificationManager Throttling
+
+Runs NotificationManager against a real SQLite StateManager database with a
+recording Telegram stub (no network).
+"""
+
+import sys
+import os
+
+# Import baseline_v1_live as a package (go up one level from tests/ folder)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from baseline_v1_live.state_manager import StateManager
+from baseline_v1_live.notification_manager import NotificationManager
+
+print("="*80)
+print("TESTING NOTIFICATION MANAGER THROTTLING")
+print("="*80)
+
+
+class RecordingTelegram:
+    """Stands in for TelegramNotifier; keeps every message sent"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, message, parse_mode=None):
+        self.sent.append(message)
+        return True
+
+
+def check(condition, description):
+    if condition:
+        print(f"[PASS] {description}")
+    else:
+        print(f"[FAIL] {description}")
+        sys.exit(1)
+
+
+def log_row(state, error_msg):
+    return state.conn.execute(
+        "SELECT occurrence_count, notification_count, is_resolved "
+        "FROM error_notifications_log WHERE error_message = ?", (error_msg,)
+    ).fetchone()
+
+
+db_path = os.path.join(os.path.dirname(__file__), 'test_notifications.db')
+for suffix in ('', '-wal', '-shm'):
+    if os.path.exists(db_path + suffix):
+        os.remove(db_path + suffix)
+
+state = StateManager(db_path)
+telegram = RecordingTelegram()
+manager = NotificationManager(telegram, state)
+
+# Test 1: First occurrence is sent
+print("\n[TEST 1] First occurrence...")
+print("-"*80)
+manager.send_error_notification('OPENALGO_DOWN', 'Connection refused')
+manager.flush()
+check(len(telegram.sent) == 1, "First occurrence sent")
+check(telegram.sent[0].startswith('[ALERT] OPENALGO_DOWN'), "Message has ALERT prefix")
+check(tuple(log_row(state, 'Connection refused')) == (1, 1, 0), "Logged with 1 occurrence, 1 notification")
+
+# Test 2: Repeats within the throttle window are recorded but not sent
+print("\n[TEST 2] Same error within throttle window...")
+print("-"*80)
+for _ in range(5):
+    manager.send_error_notification('OPENALGO_DOWN', 'Connection refused')
+manager.flush()
+check(len(telegram.sent) == 1, "Repeats throttled (in-memory cache)")
+check(tuple(log_row(state, 'Connection refused')) == (6, 1, 0), "Repeats still counted as occurrences")
+
+# A fresh manager (e.g. after restart) has no cache and throttles from the database
+restarted = NotificationManager(telegram, state)
+check(not restarted.should_send_notification('OPENALGO_DOWN', 'Connection refused'),
+      "should_send_notification throttles from the database")
+restarted.send_error_notification('OPENALGO_DOWN', 'Connection refused')
+restarted.flush()
+check(len(telegram.sent) == 1, "Throttled by the UPSERT after restart")
+check(tuple(log_row(state, 'Connection refused')) == (7, 1, 0), "Occurrence counted after restart")
+
+# Test 3: Critical errors bypass throttling
+print("\n[TEST 3] Critical error bypasses throttle...")
+print("-"*80)
+manager.send_error_notification('OPENALGO_DOWN', 'Connection refused', is_critical=True)
+manager.flush()
+check(len(telegram.sent) == 2, "Critical occurrence sent")
+check(tuple(log_row(state, 'Connection refused')) == (8, 2, 0), "Critical send counted as a notification")
+
+# Test 4: Resolved errors notify again when they recur
+print("\n[TEST 4] Resolved then recurring error...")
+print("-"*80)
+manager.mark_resolved('OPENALGO_DOWN', 'Connection refused')
+check(tuple(log_row(state, 'Connection refused'))[2] == 1, "Error marked resolved")
+manager.send_error_notification('OPENALGO_DOWN', 'Connection refused')
+manager.flush()
+check(len(telegram.sent) == 3, "Recurring error sent after resolution")
+check(tuple(log_row(state, 'Connection refused')) == (9, 3, 0), "Recurrence reopens the error")
+manager.send_error_notification('OPENALGO_DOWN', 'Connection refused')
+manager.flush()
+check(len(telegram.sent) == 3, "Throttled again after the re-send")
+
+# Test 5: Zero throttle window always sends
+print("\n[TEST 5] Recovery notifications always sent...")
+print("-"*80)
+manager.send_error_notification('SYSTEM_RECOVERED', 'OpenAlgo reachable')
+manager.send_error_notification('SYSTEM_RECOVERED', 'OpenAlgo reachable')
+manager.flush()
+check(len(telegram.sent) == 5, "Both recovery notifications sent")
+check(telegram.sent[-1].startswith('[SUCCESS] SYSTEM_RECOVERED'), "Message has SUCCESS prefix")
+
+# Cleanup
+print("\n[CLEANUP] Removing test database...")
+state.close()
+for suffix in ('', '-wal', '-shm'):
+    if os.path.exists(db_path + suffix):
+        os.remove(db_path + suffix)
+print("[PASS] Test database removed")
+
+print("\n" + "="*80)
+print("[SUCCESS] All notification manager tests passed!")
+print("="*80)